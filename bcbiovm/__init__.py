@@ -1,9 +1,13 @@
 """Run bcbio-nextgen installations inside of virtual machines
 and containers.
 """
+import atexit
 import os
 import sys
 import logging
+import threading
+
+from six.moves import queue
 
 from bcbiovm.common import constant
 
@@ -21,10 +25,18 @@ _ENVIRONMENT = (
 
 class _NameSpace(object):
 
-    def __init__(self, data, name, fields):
-        self._data = data
+    """View over the fields from a config namespace.
+
+    The values are read from the flat lookup of the namespace kept by
+    the config, which is fetched again only when the version of the
+    config changes.
+    """
+
+    def __init__(self, config, name):
+        self._config = config
         self._name = name
-        self._fields = fields
+        self._version = None
+        self._values = {}
 
     def __str__(self):
         """String representation for current task."""
@@ -37,33 +49,37 @@ class _NameSpace(object):
         if name.startswith("_"):
             self.__dict__[name] = value
         else:
-            key = self._key(name)
-            self._data[key] = value
+            self._config[self._key(name)] = value
 
     def __setitem__(self, name, value):
         """Hook set item method for update the received item
         from config.
         """
-        key = self._key(name)
-        self._data[key] = value
+        self._config[self._key(name)] = value
 
     def __getattr__(self, name):
         """Hook for getting attributes from local storage"""
-        fields = self.__dict__.get("_fields", ())
-        if name in fields:
-            key = self._key(name)
-            return self._data[key]
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        values = self._lookup()
+        if name in values:
+            return values[name]
 
         raise AttributeError("'NameSpace' object has no attribute '{}'"
                              .format(name))
 
     def __getitem__(self, key):
         """Hook for getting items from local storage"""
-        key_name = self._key(key)
-        if key_name in self._data:
-            return self._data[key_name]
+        return self._lookup()[key]
 
-        raise KeyError(key)
+    def _lookup(self):
+        """Return the values from the current namespace."""
+        # pylint: disable=protected-access
+        if self._version != self._config._version:
+            self._values = self._config._flat.get(self._name, {})
+            self._version = self._config._version
+        return self._values
 
     def _key(self, field):
         """Return the key name for the received field."""
@@ -71,28 +87,91 @@ class _NameSpace(object):
 
     def get(self, field, default=None):
         """Return the value of the received field if exists."""
-        try:
-            return self[self._key(field)]
-        except KeyError:
-            return default
+        return self._lookup().get(field, default)
 
     def fields(self):
         """The fields available in the current namespace."""
-        return list(self._fields)
+        return list(self._lookup())
+
+    def items(self):
+        """The fields available in the current namespace and their
+        values.
+        """
+        return list(self._lookup().items())
+
+
+class _Snapshot(object):
+
+    """Read-only copy of the config values.
+
+    The namespaces and the fields are plain attributes, so the hot paths
+    can read them without hashing the full key of each value.
+
+    Example:
+    ::
+        attempts = config.snapshot.misc.attempts
+        queue_size = config.snapshot.log.queue.size
+    """
+
+    def __init__(self, values):
+        for name, value in values.items():
+            if isinstance(value, dict):
+                value = _Snapshot(value)
+            elif isinstance(value, list):
+                value = tuple(value)
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("The config snapshot is read-only.")
+
+    def __delattr__(self, name):
+        raise AttributeError("The config snapshot is read-only.")
+
+    def __getitem__(self, key):
+        """Return the value of the received dotted key."""
+        value = self
+        for name in key.split("."):
+            try:
+                value = value.__dict__[name]
+            except (AttributeError, KeyError):
+                raise KeyError(key)
+        return value
+
+    def __repr__(self):
+        return "<Snapshot: {}>".format(sorted(self.__dict__))
 
 
 class _Config(object):
 
-    """Container for global config values."""
+    """Container for global config values.
+
+    The values are loaded in layers, each one overriding the previous:
+    the defaults, the profile of the current environment (`BCBIO_ENV`),
+    the config files (see `constant.PATH.CONFIG` and `BCBIO_CONFIG`)
+    and the environment variables.
+
+    Besides the values indexed by their full key, the config keeps for
+    each namespace a flat lookup with the values indexed by field and
+    a cached :class:`_NameSpace` view. Every change increases the
+    version of the config, which invalidates the lookups used by the
+    views and the :attr:`snapshot`.
+    """
 
-    def __init__(self, defaults=None, environment=None):
+    def __init__(self, defaults=None, environment=None, files=None):
         if environment is None:
             environment = os.environ.get("BCBIO_ENV", "production")
+        if files is None:
+            files = list(constant.PATH.CONFIG)
+            if os.environ.get("BCBIO_CONFIG"):
+                files.append(os.environ["BCBIO_CONFIG"])
 
         self._data = {}
         self._defaults = defaults or {}
         self._environment = constant.ENVIRONMENT.get(environment, {})
-        self._namespace = {}
+        self._files = files
+        self._flat = {}
+        self._snapshot = None
+        self._version = 0
 
     def __str__(self):
         """String representation for current task."""
@@ -103,39 +182,124 @@ class _Config(object):
         from config.
         """
         if "." in name:
-            self._update_namespace((name, ))
-            self._data[name] = value
+            self._store(name, value)
+            self._version += 1
 
     def __getitem__(self, key):
         """Hook for getting items from local storage"""
-        if key in self._data:
-            return self._data[key]
-        raise KeyError(key)
+        return self._data[key]
 
     def __getattr__(self, name):
         """Hook for getting attributes from local storage"""
-        namespace = self.__dict__.get("_namespace")
-        if namespace and name in namespace:
-            return _NameSpace(self._data, name, namespace[name])
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        if name in self._flat:
+            # Note: The view is stored as an instance attribute, so the
+            # next lookups do not reach this hook.
+            namespace = _NameSpace(self, name)
+            self.__dict__[name] = namespace
+            return namespace
 
         raise AttributeError("'Config' object has no attribute '{}'"
                              .format(name))
 
-    def _update_namespace(self, configurations):
-        """Create the namespaces required by the current configurations."""
-        for item in configurations:
-            if "." not in item:
+    @property
+    def version(self):
+        """The number of changes applied on the config."""
+        return self._version
+
+    @property
+    def snapshot(self):
+        """Read-only copy of the current config values.
+
+        The snapshot is compiled by :meth:`update` and compiled again
+        only if the config was changed after that.
+        """
+        if self._snapshot is None or self._snapshot[0] != self._version:
+            self._snapshot = (self._version, self._compile())
+        return self._snapshot[1]
+
+    def _compile(self):
+        """Build a :class:`_Snapshot` from the current values."""
+        tree = {}
+        for key in sorted(self._data):
+            node = tree
+            names = key.split(".")
+            for name in names[:-1]:
+                child = node.setdefault(name, {})
+                if not isinstance(child, dict):
+                    # Note: The key is also used as a namespace, the
+                    # value remains available only by its full key.
+                    break
+                node = child
+            else:
+                node.setdefault(names[-1], self._data[key])
+        return _Snapshot(tree)
+
+    def _flatten(self, values, prefix=""):
+        """Return the received nested dictionary as a dictionary with
+        dotted keys.
+
+        The values of the known keys are kept as they are, even if they
+        are dictionaries.
+        """
+        flat = {}
+        for name, value in values.items():
+            key = "{}{}".format(prefix, name)
+            if isinstance(value, dict) and key not in self._data:
+                flat.update(self._flatten(value, key + "."))
+            else:
+                flat[key] = value
+        return flat
+
+    def _load_files(self):
+        """Return the values from the available config files.
+
+        The files are YAML documents with the values grouped by
+        namespace:
+        ::
+            misc:
+              workers: 8
+            log:
+              queue:
+                enabled: true
+        """
+        values = {}
+        files = [path for path in self._files if os.path.isfile(path)]
+        if not files:
+            return values
+
+        # Note: The yaml module is imported only when a config file is
+        # available, in order to keep the cold start time low.
+        import yaml
+
+        for path in files:
+            try:
+                with open(path, "r") as file_handle:
+                    content = yaml.safe_load(file_handle) or {}
+                if not isinstance(content, dict):
+                    raise ValueError("the content is not a mapping")
+            except (IOError, OSError, ValueError, yaml.YAMLError) as exc:
+                sys.stderr.write("The config file %(path)s was ignored: "
+                                 "%(reason)s\n" %
+                                 {"path": path, "reason": exc})
                 continue
-            key, value = item.split('.', 1)
-            namaspace = self._namespace.setdefault(key, set())
-            namaspace.add(value)
+            values.update(self._flatten(content))
+        return values
+
+    def _store(self, key, value):
+        """Update the value of the received key and the flat lookup
+        of its namespace.
+        """
+        self._data[key] = value
+        if "." in key:
+            namespace, field = key.split(".", 1)
+            self._flat.setdefault(namespace, {})[field] = value
 
     def get(self, key, default=None):
         """Return the value of the received key if exists."""
-        try:
-            return self[key]
-        except KeyError:
-            return default
+        return self._data.get(key, default)
 
     def update(self):
         """Update fields from local storage."""
@@ -144,15 +308,158 @@ class _Config(object):
         environ = {"env.{0}".format(key): os.environ[key]
                    for key in _ENVIRONMENT if key in os.environ}
 
-        for configurations in (self._defaults, self._environment, environ):
-            self._data.update(configurations)
-            self._update_namespace(configurations)
+        for configurations in (self._defaults, self._environment):
+            for key, value in configurations.items():
+                self._store(key, value)
+
+        # Note: The config files are loaded after the defaults, because
+        # the known keys are used for flattening their content.
+        for configurations in (self._load_files(), environ):
+            for key, value in configurations.items():
+                self._store(key, value)
+
+        self._version += 1
+        self._snapshot = (self._version, self._compile())
+
+
+class _QueueHandler(logging.Handler):
+
+    """Handler which sends the log records to a :class _QueueListener:.
+
+    The records are processed by the handler received as target on
+    the listener's thread.
+    """
+
+    def __init__(self, listener, target):
+        logging.Handler.__init__(self, level=target.level)
+        self._listener = listener
+        self.target = target
+
+    @staticmethod
+    def prepare(record):
+        """Prepare the record before being enqueued.
+
+        The message is merged with its arguments and the exception
+        information is formatted, so the record does not keep references
+        to objects which can change before being processed.
+        """
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(
+                record.exc_info)
+            record.exc_info = None
+        return record
+
+    def emit(self, record):
+        """Send the record to the listener."""
+        try:
+            self._listener.enqueue(self.target, self.prepare(record))
+        except (KeyboardInterrupt, SystemExit):
+            raise
+        except Exception:   # pylint: disable=broad-except
+            self.handleError(record)
+
+
+class _QueueListener(object):
+
+    """Process on a background thread the log records received from
+    the :class _QueueHandler: instances.
+
+    :param size:    the maximum number of records waiting to be processed
+    :param policy:  what to do when the queue is full; `block` waits
+                    at most `timeout` seconds for a free slot before
+                    dropping the record, `drop` discards the record
+                    immediately
+    :param timeout: the number of seconds to wait for a free slot
+    """
+
+    BLOCK = "block"
+    DROP = "drop"
+    _SENTINEL = None
+
+    def __init__(self, size, policy=BLOCK, timeout=None):
+        self._queue = queue.Queue(size)
+        self._policy = policy
+        self._timeout = timeout
+        self._dropped = 0
+        self._thread = None
+
+    @property
+    def dropped(self):
+        """The number of records dropped because the queue was full."""
+        return self._dropped
+
+    def _monitor(self):
+        """Process the records from the queue until the sentinel
+        is received.
+        """
+        while True:
+            item = self._queue.get()
+            try:
+                if item is self._SENTINEL:
+                    break
+                target, record = item
+                if record.levelno >= target.level:
+                    target.handle(record)
+            finally:
+                self._queue.task_done()
+
+    def start(self):
+        """Start the thread which processes the records."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._monitor,
+                                            name="bcbiovm-log-listener")
+            self._thread.daemon = True
+            self._thread.start()
+
+    def enqueue(self, target, record):
+        """Add the received record in the queue."""
+        try:
+            if self._policy == self.DROP:
+                self._queue.put_nowait((target, record))
+            else:
+                self._queue.put((target, record), timeout=self._timeout)
+        except queue.Full:
+            self._dropped += 1
+
+    def flush(self):
+        """Wait until all the enqueued records are processed."""
+        if self._thread is not None:
+            self._queue.join()
+
+    def stop(self):
+        """Process all the enqueued records and stop the thread."""
+        if self._thread is None:
+            return
+
+        self._queue.put(self._SENTINEL)
+        self._thread.join()
+        self._thread = None
+
+        if self._dropped:
+            sys.stderr.write("%(count)d log records were dropped.\n" %
+                             {"count": self._dropped})
 
 
 class _Logging(object):
 
     def __init__(self):
         self._loggers = {}
+        self._listener = None
+        self._targets = {}
+
+    @property
+    def listener(self):
+        """The listener used by the queued handlers."""
+        if self._listener is None:
+            self._listener = _QueueListener(
+                size=config["log.queue.size"],
+                policy=config["log.queue.policy"],
+                timeout=config["log.queue.timeout"])
+            self._listener.start()
+            atexit.register(self.shutdown)
+        return self._listener
 
     @classmethod
     def file_handler(cls, handler=None):
@@ -195,9 +502,46 @@ class _Logging(object):
             handlers[handler.name] = handler
         return handlers
 
+    def _queued_handler(self, name, handler=None):
+        """Return a handler which sends the records to the listener
+        instead of processing them on the caller's thread.
+
+        All the loggers share the same target handler.
+        """
+        getter = getattr(self, name)
+        old_target = self._targets.get(name)
+        target = getter(old_target)
+        if old_target is not None and target is not old_target:
+            self.listener.flush()
+            old_target.close()
+
+        if target is None:
+            self._targets.pop(name, None)
+            return None
+
+        self._targets[name] = target
+        if isinstance(handler, _QueueHandler) and handler.target is target:
+            handler.setLevel(target.level)
+            return handler
+
+        queued_handler = _QueueHandler(self.listener, target)
+        queued_handler.set_name(name)
+        return queued_handler
+
     def _update_handler(self, name, handler=None):
-        getter = getattr(self, name, None)
-        return getter(handler) if getter else None
+        if not hasattr(self, name):
+            return None
+
+        if (config["log.queue.enabled"] and
+                name in config["log.queue.handlers"]):
+            return self._queued_handler(name, handler)
+
+        if isinstance(handler, _QueueHandler):
+            # The queued mode was disabled, process the records which
+            # are still waiting in the queue.
+            self.listener.flush()
+            handler = None
+        return getattr(self, name)(handler)
 
     def _setup_logger(self, logger):
         """Setup the received logger."""
@@ -205,11 +549,12 @@ class _Logging(object):
                             config["log.file.level"]))
         for name, handler in self._get_handlers(logger).items():
             new_handler = self._update_handler(name, handler)
-            if new_handler is None and handler:
-                handler.flush()
-                handler.close()
+            if handler and new_handler is not handler:
+                if not isinstance(handler, _QueueHandler):
+                    handler.flush()
+                    handler.close()
                 logger.removeHandler(handler)
-            elif new_handler and handler is None:
+            if new_handler and new_handler is not handler:
                 logger.addHandler(new_handler)
 
     def get_logger(self, name):
@@ -227,6 +572,17 @@ class _Logging(object):
         for logger in self._loggers.values():
             self._setup_logger(logger)
 
+    def shutdown(self):
+        """Process all the queued records and release the handlers."""
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+
+        for target in self._targets.values():
+            target.flush()
+            target.close()
+        self._targets.clear()
+
 
 log = _Logging()
 config = _Config(defaults=constant.DEFAULTS)
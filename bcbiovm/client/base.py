@@ -12,6 +12,7 @@ from bcbio.client import base as client_base
 from bcbiovm import log as logging
 from bcbiovm.client import tools as client_tools
 from bcbiovm.common import exception
+from bcbiovm.common import importutils
 
 LOG = logging.get_logger(__name__)
 
@@ -179,6 +180,9 @@ class Group(object):
     """Contract class for all the command groups.
 
     :ivar: commands: A list which contains (command, parser_name) tuples.
+                     The command can be the class itself or its import
+                     path, in which case it will be imported only when
+                     it is bound to the current group.
 
     ::
     Example:
@@ -188,7 +192,8 @@ class Group(object):
             commands = [
                 (ExampleOne, "main_parser"),
                 (ExampleTwo, "main_parser),
-                (ExampleThree, "second_parser")
+                (ExampleThree, "second_parser"),
+                ("package.module.ExampleFour", "second_parser"),
             ]
 
             # ...
@@ -213,7 +218,12 @@ class Group(object):
 
     def _bind_commands(self):
         """Bind the received commands to the current command group."""
-        for command, parser in self.commands or ():
+        for item in self.commands or ():
+            command, parser = item[:2]
+            if not self.is_required(item):
+                continue
+
+            command = importutils.resolve(command)
             if not self.check_command(command):
                 LOG.error("The command %(command)r is not recognized.",
                           {"command": command})
@@ -232,6 +242,13 @@ class Group(object):
             raise ValueError("Invalid parser name %(name)s" %
                              {"name": name})
 
+    def is_required(self, item):
+        """Check if the received item from the commands list should be
+        bound to the current command group.
+        """
+        # pylint: disable=unused-argument
+        return True
+
     def check_command(self, command):
         """Check if the received command is valid and can be
         property used.
@@ -260,6 +277,11 @@ class Client(Group, Worker):
     """Contract class for all the command line applications.
 
     :ivar: commands: A list which contains (command, parser_name) tuples
+                     or (command, parser_name, name) tuples, where name is
+                     the sub-command exposed by the command. The commands
+                     which have a name are bound only if they are
+                     selected by the command line (or if the command
+                     line does not select any of them).
 
     ::
     Example:
@@ -276,9 +298,9 @@ class Client(Group, Worker):
     """
 
     def __init__(self, command_line):
-        super(Client, self).__init__(parent=None, parser=None)
         self._args = None
         self._command_line = command_line
+        super(Client, self).__init__(parent=None, parser=None)
 
     @property
     def args(self):
@@ -290,6 +312,27 @@ class Client(Group, Worker):
         """Command line provided to parser."""
         return self._command_line
 
+    def selected_command(self):
+        """The name of the sub-command selected by the command line.
+
+        :return: the name of the sub-command or None if the command line
+                 does not select any of the named commands
+        """
+        names = [item[2] for item in self.commands or () if len(item) > 2]
+        for argument in self.command_line:
+            if argument.startswith("-"):
+                continue
+            return argument if argument in names else None
+
+    def is_required(self, item):
+        """Check if the received item from the commands list should be
+        bound to the current command group.
+        """
+        selected = self.selected_command()
+        if len(item) < 3 or selected is None:
+            return True
+        return item[2] == selected
+
     def task_done(self, result):
         """What to execute after successfully finished processing a task."""
         pass
@@ -1,5 +0,0 @@
-from bcbiovm.client.commands import container
-from bcbiovm.client.commands import provider
-from bcbiovm.client.commands import common
-from bcbiovm.client.commands import ipython
-from bcbiovm.client.commands import tools
@@ -1,15 +1,14 @@
 """Commands without a special group."""
 from __future__ import print_function
+import sys
 
-import matplotlib
-matplotlib.use('Agg')
-import pylab
-from bcbio.graph import graph
 from bcbio.workflow import template
 
+from bcbiovm import config as bcbio_config
 from bcbiovm import log as logging
 from bcbiovm.client import base
 from bcbiovm.common import constant
+from bcbiovm.common import objects
 from bcbiovm.provider import factory as cloud_factory
 
 LOG = logging.get_logger(__name__)
@@ -28,7 +27,13 @@ class Info(base.Command):
         parser.add_argument("-c", "--cluster", default="bcbio",
                             help="Elasticluster cluster name")
         parser.add_argument("-v", "--verbose", action="store_true",
-                            default=False, help="Emit verbose output")
+                            default=False,
+                            help="Include the title and the description "
+                                 "of each section in the text output.")
+        parser.add_argument(
+            "--format", choices=("text", "jsonl"), default="text",
+            help="The output format: fixed-width text tables or JSON "
+                 "Lines (one object for each section and row).")
 
         parser.set_defaults(work=self.run)
 
@@ -38,13 +43,17 @@ class Info(base.Command):
         provider = cloud_factory.get(provider_str)()
         econf = self.args.econfig or constant.PATH.EC_CONFIG.format(
             provider=provider_str)
-        info = provider.information(econf, self.args.cluster,
-                                    verbose=self.args.verbose)
-        if not info:
-            LOG.warning("No info from provider %(provider)s.",
-                        {"provider": self.args.provider})
-            return
-        print(info.text())
+        if self.args.format == "jsonl":
+            writer = objects.JSONLinesWriter(sys.stdout)
+        else:
+            writer = objects.TextWriter(sys.stdout,
+                                        verbose=self.args.verbose)
+
+        # Note: The rows are written as soon as they are fetched.
+        try:
+            provider.information(econf, self.args.cluster, writer=writer)
+        finally:
+            writer.close()
 
 
 class Graph(base.Command):
@@ -76,6 +85,10 @@ class Graph(base.Command):
             "-e", "--econfig",
             help="Elasticluster bcbio configuration file",
             default=constant.PATH.EC_CONFIG)
+        parser.add_argument(
+            "--resample", default=bcbio_config["graph.resample"],
+            help="Downsample the resource usage data using buckets of "
+                 "the received length (Ex: 10s, 60s).")
 
         parser.set_defaults(work=self.run)
 
@@ -88,9 +101,17 @@ class Graph(base.Command):
                                  config=self.args.econfig,
                                  rawdir=self.args.rawdir)
 
-        resource_usage = provider.resource_usage(bcbio_log=self.args.log,
-                                                 rawdir=self.args.rawdir)
+        resource_usage = provider.resource_usage(
+            bcbio_log=self.args.log, rawdir=self.args.rawdir,
+            resample=self.args.resample)
         if resource_usage:
+            # Note: The plotting stack is expensive to import, so it is
+            # loaded only when there is something to draw.
+            import matplotlib
+            matplotlib.use('Agg')
+            import pylab
+            from bcbio.graph import graph
+
             pylab.rcParams['figure.figsize'] = (35.0, 12.0)
             data, hardware, steps = resource_usage
             graph.generate_graphs(data_frames=data,
@@ -99,6 +120,41 @@ class Graph(base.Command):
                                   outdir=self.args.outdir)
 
 
+class Summary(base.Command):
+
+    """Summarize the resource usage of the cluster for each bcbio step."""
+
+    def setup(self):
+        """Extend the parser configuration in order to expose this command."""
+        parser = self._parser.add_parser(
+            "summary",
+            help="Summarize the resource usage (CPU/memory/network/disk I/O)"
+                 " of the cluster for each bcbio step.")
+        parser.add_argument(
+            "log",
+            help="Local path to bcbio log file written by the run.")
+        parser.add_argument(
+            "-r", "--rawdir", default="monitoring/collectl",
+            help="Directory with the raw collectl data files.")
+        parser.add_argument(
+            "--resample", default=bcbio_config["graph.resample"],
+            help="Downsample the resource usage data using buckets of "
+                 "the received length (Ex: 10s, 60s).")
+        parser.add_argument(
+            "--json", action="store_true", default=False,
+            help="Print the summary in JSON format.")
+
+        parser.set_defaults(work=self.run)
+
+    def work(self):
+        """Run the command with the received information."""
+        provider = cloud_factory.get(self.args.provider)()
+        summary = provider.resource_summary(bcbio_log=self.args.log,
+                                            rawdir=self.args.rawdir,
+                                            resample=self.args.resample)
+        print(summary.json() if self.args.json else summary.text())
+
+
 class Template(base.Command):
 
     """Create a bcbio sample.yaml file from a standard template and inputs."""
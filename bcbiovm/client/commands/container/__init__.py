@@ -1 +0,0 @@
-from bcbiovm.client.commands.container import docker
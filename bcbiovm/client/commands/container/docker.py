@@ -357,10 +357,11 @@ class RunFunction(base.Command):
             help="Name of the function to run")
         parser.add_argument(
             "parallel",
-            help="JSON/YAML file describing the parallel environment")
+            help=("JSON, msgpack or YAML file describing the parallel "
+                  "environment"))
         parser.add_argument(
             "runargs",
-            help="JSON/YAML file with arguments to the function")
+            help="JSON, msgpack or YAML file with arguments to the function")
         parser.add_argument(
             "--systemconfig",
             help=("Global YAML configuration file specifying system details. "
@@ -2,13 +2,13 @@
 
 import os
 
-import yaml
 from bcbio.distributed import clargs
 from bcbio.pipeline import main
 
 from bcbiovm import log as logging
 from bcbiovm.client import base
 from bcbiovm.common import constant
+from bcbiovm.common import serialization
 from bcbiovm.container.docker import common as docker_common
 from bcbiovm.container.docker import mounts as docker_mounts
 from bcbiovm.ipython import batchprep
@@ -95,14 +95,11 @@ class IPython(base.Command):
         parallel["wrapper"] = "runfn"
 
         LOG.debug("Loading the config: %s", self.args.sample_config)
-        with open(self.args.sample_config) as in_handle:
-            ready_config, _ = docker_mounts.normalize_config(
-                yaml.load(in_handle), self.args.fcdir)
+        ready_config, _ = docker_mounts.normalize_config(
+            serialization.read(self.args.sample_config), self.args.fcdir)
 
         LOG.debug("Writing the %s file.", ready_config_file)
-        with open(ready_config_file, "w") as out_handle:
-            yaml.safe_dump(ready_config, out_handle, default_flow_style=False,
-                           allow_unicode=False)
+        serialization.write(ready_config, ready_config_file)
 
         systemconfig = docker_common.local_system_config(
             config=self.args.systemconfig, work_dir=work_dir,
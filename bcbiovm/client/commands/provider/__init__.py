@@ -1,3 +0,0 @@
-from bcbiovm.client.commands.provider import aws
-from bcbiovm.client.commands.provider import azure
-from bcbiovm.client.commands.provider import cluster
@@ -1,4 +0,0 @@
-from bcbiovm.client.commands.provider.aws import bootstrap
-from bcbiovm.client.commands.provider.aws import clusterk
-from bcbiovm.client.commands.provider.aws import docker
-from bcbiovm.client.commands.provider.aws import icel
@@ -6,7 +6,7 @@ import textwrap
 
 from bcbiovm.client import base
 from bcbiovm.common import constant
-from bcbiovm.provider import aws
+from bcbiovm.provider.aws import aws_provider
 
 
 class IdentityAccessManagement(base.Command):
@@ -56,7 +56,7 @@ class IdentityAccessManagement(base.Command):
 
     def work(self):
         """Run the command with the received information."""
-        provider = aws.AWSProvider()
+        provider = aws_provider.AWSProvider()
         provider.bootstrap_iam(config=self.args.econfig,
                                create=not self.args.nocreate,
                                recreate=self.args.recreate)
@@ -91,7 +91,7 @@ class VirtualPrivateCloud(base.Command):
 
     def work(self):
         """Run the command with the received information."""
-        provider = aws.AWSProvider()
+        provider = aws_provider.AWSProvider()
         return provider.bootstrap_vpc(cluster=self.args.cluster,
                                       config=self.args.econfig,
                                       network=self.args.network,
@@ -1,2 +0,0 @@
-from bcbiovm.client.commands.provider.azure import docker
-from bcbiovm.client.commands.provider.azure import prepare
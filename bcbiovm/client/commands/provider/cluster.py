@@ -43,6 +43,34 @@ class CommandMixin(base.Command):
 
         return(status, report)
 
+    @staticmethod
+    def _process_playbook_timings(response):
+        """Create a report with the slowest tasks and hosts from the
+        information received from AnsiblePlaybook.
+        """
+        report = objects.Report()
+        tasks = report.add_section(
+            name="tasks", title="The slowest Ansible tasks",
+            fields=[{"name": "playbook", "title": "Ansible playbook"},
+                    {"name": "task", "title": "Task"},
+                    {"name": "duration", "title": "Duration (seconds)"}])
+        hosts = report.add_section(
+            name="hosts", title="The slowest hosts",
+            fields=[{"name": "playbook", "title": "Ansible playbook"},
+                    {"name": "host", "title": "Host"},
+                    {"name": "duration", "title": "Duration (seconds)"}])
+
+        for playbook, playbook_info in response.items():
+            timings = getattr(playbook_info, "timings", None)
+            if not timings:
+                continue
+            for task, duration in timings.slowest_tasks():
+                tasks.add_item([playbook, task, "%.2f" % duration])
+            for host, duration in timings.slowest_hosts():
+                hosts.add_item([playbook, host, "%.2f" % duration])
+
+        return report
+
     def prologue(self):
         """Executed once before the command running."""
         super(CommandMixin, self).prologue()
@@ -79,6 +107,10 @@ class Bootstrap(CommandMixin):
         parser.add_argument(
             "-r", "--no-reboot", default=False, action="store_true",
             help="Don't upgrade the cluster host OS and reboot")
+        parser.add_argument(
+            "--force", default=False, action="store_true",
+            help="Run all the playbooks, even if nothing changed since "
+                 "their last run")
 
         parser.set_defaults(work=self.run)
 
@@ -91,8 +123,11 @@ class Bootstrap(CommandMixin):
         provider = cloud_factory.get(self.args.provider)()
         response = provider.bootstrap(cluster=self.args.cluster,
                                       config=self.args.econfig,
-                                      reboot=not self.args.no_reboot)
+                                      reboot=not self.args.no_reboot,
+                                      force=self.args.force)
         status, report = self._process_playbook_response(response)
+        LOG.info("Ansible playbooks profile:\n%s",
+                 self._process_playbook_timings(response).text())
         if status:
             LOG.debug("All playbooks runned without problems.")
         else:
@@ -194,6 +229,8 @@ class Start(CommandMixin):
                                       reboot=not self.args.no_reboot)
 
         status, report = self._process_playbook_response(response)
+        LOG.info("Ansible playbooks profile:\n%s",
+                 self._process_playbook_timings(response).text())
         if status:
             LOG.debug("All playbooks runned without problems.")
         else:
@@ -1,13 +1,10 @@
-"""The commands used by the command line parser."""
-from bcbio.client import groups as bcbio_groups
+"""The commands used by the command line parser.
 
+The commands are referenced using their import path, so they are
+imported only when their group is bound to the command line parser.
+"""
 from bcbiovm import log as logging
 from bcbiovm.client import base
-from bcbiovm.client import commands as client_commands
-from bcbiovm.client.commands import provider
-from bcbiovm.client.commands import container
-from bcbiovm.client.commands.provider import aws as aws_provider
-from bcbiovm.client.commands.provider import azure as azure_provider
 
 LOG = logging.get_logger(__name__)
 
@@ -18,8 +15,8 @@ class Config(base.Group):
     ways to edit in place.
     """
     commands = [
-        (provider.cluster.EditConfig, "actions"),
-        (provider.cluster.CreateConfig, "actions")
+        ("bcbiovm.client.commands.provider.cluster.EditConfig", "actions"),
+        ("bcbiovm.client.commands.provider.cluster.CreateConfig", "actions")
     ]
 
     def setup(self):
@@ -38,8 +35,8 @@ class Docker(base.Group):
     """Utilities to help with develping using bcbion inside of docker."""
 
     commands = [
-        (container.docker.SetupInstall, "actions"),
-        (container.docker.SystemUpdate, "actions")
+        ("bcbiovm.client.commands.container.docker.SetupInstall", "actions"),
+        ("bcbiovm.client.commands.container.docker.SystemUpdate", "actions")
     ]
 
     def setup(self):
@@ -57,8 +54,9 @@ class DockerAWS(Docker):
     """Utilities to help with develping using bcbion inside of docker."""
 
     commands = [
-        (aws_provider.docker.Build, "actions"),
-        (aws_provider.docker.BiodataUpload, "actions"),
+        ("bcbiovm.client.commands.provider.aws.docker.Build", "actions"),
+        ("bcbiovm.client.commands.provider.aws.docker.BiodataUpload",
+         "actions"),
     ]
     commands.extend(Docker.commands)
 
@@ -68,8 +66,9 @@ class DockerAzure(Docker):
     """Utilities to help with develping using bcbion inside of docker."""
 
     commands = [
-        (azure_provider.docker.Build, "actions"),
-        (azure_provider.docker.BiodataUpload, "actions"),
+        ("bcbiovm.client.commands.provider.azure.docker.Build", "actions"),
+        ("bcbiovm.client.commands.provider.azure.docker.BiodataUpload",
+         "actions"),
     ]
     commands.extend(Docker.commands)
 
@@ -79,12 +78,12 @@ class ElastiCluster(base.Group):
     """Run and manage a cluster using elasticluster."""
 
     commands = [
-        (provider.cluster.Bootstrap, "actions"),
-        (provider.cluster.Start, "actions"),
-        (provider.cluster.Stop, "actions"),
-        (provider.cluster.Setup, "actions"),
-        (provider.cluster.SSHConnection, "actions"),
-        (provider.cluster.Command, "actions"),
+        ("bcbiovm.client.commands.provider.cluster.Bootstrap", "actions"),
+        ("bcbiovm.client.commands.provider.cluster.Start", "actions"),
+        ("bcbiovm.client.commands.provider.cluster.Stop", "actions"),
+        ("bcbiovm.client.commands.provider.cluster.Setup", "actions"),
+        ("bcbiovm.client.commands.provider.cluster.SSHConnection", "actions"),
+        ("bcbiovm.client.commands.provider.cluster.Command", "actions"),
     ]
 
     def setup(self):
@@ -101,11 +100,11 @@ class ICELCommand(base.Group):
     """Create scratch filesystem using Intel Cloud Edition for Lustre."""
 
     commands = [
-        (aws_provider.icel.Create, "actions"),
-        (aws_provider.icel.Specification, "actions"),
-        (aws_provider.icel.Mount, "actions"),
-        (aws_provider.icel.Unmount, "actions"),
-        (aws_provider.icel.Stop, "actions"),
+        ("bcbiovm.client.commands.provider.aws.icel.Create", "actions"),
+        ("bcbiovm.client.commands.provider.aws.icel.Specification", "actions"),
+        ("bcbiovm.client.commands.provider.aws.icel.Mount", "actions"),
+        ("bcbiovm.client.commands.provider.aws.icel.Unmount", "actions"),
+        ("bcbiovm.client.commands.provider.aws.icel.Stop", "actions"),
     ]
 
     def setup(self):
@@ -121,9 +120,12 @@ class ICELCommand(base.Group):
 class PrepareEnvironment(base.Group):
 
     commands = [
-        (azure_provider.prepare.ManagementCertificate, "actions"),
-        (azure_provider.prepare.PrivateKey, "actions"),
-        (azure_provider.prepare.DataDirectory, "actions"),
+        ("bcbiovm.client.commands.provider.azure.prepare."
+         "ManagementCertificate", "actions"),
+        ("bcbiovm.client.commands.provider.azure.prepare.PrivateKey",
+         "actions"),
+        ("bcbiovm.client.commands.provider.azure.prepare.DataDirectory",
+         "actions"),
     ]
 
     def setup(self):
@@ -141,9 +143,9 @@ class Tools(base.Group):
     """Tools and utilities."""
 
     commands = [
-        (bcbio_groups.Downloader, "tools"),
-        (client_commands.tools.S3Upload, "storage_manager"),
-        (client_commands.tools.BlobUpload, "storage_manager"),
+        ("bcbio.client.groups.Downloader", "tools"),
+        ("bcbiovm.client.commands.tools.S3Upload", "storage_manager"),
+        ("bcbiovm.client.commands.tools.BlobUpload", "storage_manager"),
     ]
 
     def setup(self):
@@ -164,11 +166,14 @@ class AWSProvider(base.Group):
     """Automate resources for running bcbio on AWS."""
 
     commands = [
-        (aws_provider.bootstrap.IdentityAccessManagement, "actions"),
-        (aws_provider.bootstrap.VirtualPrivateCloud, "actions"),
-        (aws_provider.clusterk.ClusterK, "actions"),
-        (client_commands.common.Graph, "actions"),
-        (client_commands.common.Info, "actions"),
+        ("bcbiovm.client.commands.provider.aws.bootstrap."
+         "IdentityAccessManagement", "actions"),
+        ("bcbiovm.client.commands.provider.aws.bootstrap.VirtualPrivateCloud",
+         "actions"),
+        ("bcbiovm.client.commands.provider.aws.clusterk.ClusterK", "actions"),
+        ("bcbiovm.client.commands.common.Graph", "actions"),
+        ("bcbiovm.client.commands.common.Info", "actions"),
+        ("bcbiovm.client.commands.common.Summary", "actions"),
         (Config, "actions"),
         (DockerAWS, "actions"),
         (ElastiCluster, "actions"),
@@ -188,8 +193,9 @@ class AzureProvider(base.Group):
 
     """Automate resources for running bcbio on Azure."""
     commands = [
-        (client_commands.common.Info, "actions"),
-        (client_commands.common.Graph, "actions"),
+        ("bcbiovm.client.commands.common.Info", "actions"),
+        ("bcbiovm.client.commands.common.Graph", "actions"),
+        ("bcbiovm.client.commands.common.Summary", "actions"),
         (Config, "actions"),
         (DockerAzure, "actions"),
         (ElastiCluster, "actions"),
@@ -2,13 +2,12 @@
 import os
 import sys
 
-import yaml
-
 from bcbiovm import config as bconfig
 from bcbiovm import log as logging
+from bcbiovm.common import constant
 from bcbiovm.common import exception
-from bcbiovm.provider.aws import storage as aws_storage
-from bcbiovm.provider.azure import storage as azure_storage
+from bcbiovm.common import serialization
+from bcbiovm.provider import factory as provider_factory
 
 LOG = logging.get_logger(__name__)
 
@@ -84,12 +83,11 @@ class Defaults(Tool):
         config_file = self._get_config_file()
 
         if config_file:
-            with open(config_file) as in_handle:
-                try:
-                    defaults = yaml.load(in_handle)
-                except ValueError as exc:
-                    LOG.exception("Failed to load user configuration "
-                                  "file: %(reason)s", {"reason": exc})
+            try:
+                defaults = serialization.read(config_file)
+            except ValueError as exc:
+                LOG.exception("Failed to load user configuration "
+                              "file: %(reason)s", {"reason": exc})
 
         return defaults
 
@@ -115,7 +113,8 @@ class Defaults(Tool):
             LOG.debug("The sample config file is on the local storage.")
             return
 
-        for manager in (aws_storage.AmazonS3, azure_storage.AzureBlob):
+        for provider in (constant.PROVIDER.AWS, constant.PROVIDER.AZURE):
+            manager = provider_factory.get_storage(provider)
             if not manager.check_resource(sample_config):
                 continue
 
@@ -148,9 +147,7 @@ class Defaults(Tool):
         if new_config:
             config_file = self._get_config_file(just_filename=True)
             LOG.info("Writing the config file to %r.", config_file)
-            with open(config_file, "w") as config_handle:
-                yaml.dump(new_config, config_handle, default_flow_style=False,
-                          allow_unicode=False)
+            serialization.write(new_config, config_file)
 
     def check_datadir(self, reason=None):
         """Check if the datadir exists if it is required."""
@@ -186,8 +183,7 @@ class Install(Tool):
         install_config = self._get_config_file()
 
         if install_config and os.path.exists(install_config):
-            with open(install_config) as in_handle:
-                defaults = yaml.load(in_handle)
+            defaults = serialization.read(install_config)
         return defaults if defaults else {}
 
     def _add_docker_defaults(self, defaults):
@@ -231,8 +227,7 @@ class Install(Tool):
         install_config = self._get_config_file()
 
         if os.path.exists(install_config):
-            with open(install_config) as in_handle:
-                current_config = yaml.load(in_handle)
+            current_config = serialization.read(install_config)
 
         for attribute in ("genomes", "aligners"):
             if not current_config.get(attribute):
@@ -245,6 +240,4 @@ class Install(Tool):
         if self.args.image and self.args.image != bconfig["docker.image"]:
             current_config["image"] = self.args.image
 
-        with open(install_config, "w") as out_handle:
-            yaml.dump(current_config, out_handle, default_flow_style=False,
-                      allow_unicode=False)
+        serialization.write(current_config, install_config)
@@ -1,7 +1,10 @@
 """Manage a cluster's life cycle."""
 
+import collections
 import os
 import sys
+import threading
+import time
 
 import ansible.utils
 import ansible.callbacks
@@ -17,13 +20,109 @@ from bcbiovm.common import exception
 
 LOG = logging.get_logger(__name__)
 
-__all__ = ['AnsiblePlaybook', 'ElastiCluster']
+__all__ = ['AnsiblePlaybook', 'ClusterManager', 'ElastiCluster']
 
 _EC_ANSIBLE_LIBRARY = os.path.join(sys.prefix, "share", "elasticluster",
                                    "providers", "ansible-playbooks",
                                    "library")
 _EC_STORAGE = os.path.join(constant.PATH.EC, "storage")
 _PICKLE_FILE = os.path.join(_EC_STORAGE, "%(cluster)s.pickle")
+# Note: Sets NFS client parameters for elasticluster Ansible playbook.
+#       Uses async clients which provide better throughput on
+#       reads/writes: http://goo.gl/tGrGtE (section 5.9 for tradeoffs)
+_NFS_OPTIONS = "rw,async,nfsvers=3"
+
+ClusterResult = collections.namedtuple(
+    "ClusterResult", ["cluster", "operation", "status", "nodes",
+                      "duration", "error"])
+
+
+class _ConfigCache(object):
+
+    """Process-wide cache for the Elasticluster configurations and
+    the clusters loaded from the cluster repository.
+
+    The configurations are keyed by the path and the mtime of the
+    config file and the storage directory, while the clusters are
+    also keyed by the mtime of their pickle file.
+    """
+
+    def __init__(self):
+        self._configs = {}
+        self._clusters = {}
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _mtime(path):
+        """Return the mtime of the received file or None if the file
+        does not exist.
+        """
+        try:
+            return os.path.getmtime(path)
+        except OSError:
+            return None
+
+    def configurator(self, config_file, storage_dir):
+        """Return the :class Configurator: for the received config
+        file and storage directory.
+        """
+        key = (config_file, self._mtime(config_file), storage_dir)
+        with self._lock:
+            if key not in self._configs:
+                LOG.debug("Loading the Elasticluster configuration from "
+                          "%(config)r", {"config": config_file})
+                try:
+                    configurator = ec_conf.Configurator.fromConfig(
+                        config_file, storage_dir)
+                except voluptuous.Error:
+                    raise exception.InvalidConfig(config_file=config_file,
+                                                  storage_dir=storage_dir)
+                self.invalidate(config_file, storage_dir)
+                self._configs[key] = configurator
+            return self._configs[key]
+
+    def cluster(self, config_file, storage_dir, cluster_name):
+        """Return the cluster loaded from the cluster repository."""
+        pickle_file = os.path.join(storage_dir, "%s.pickle" % cluster_name)
+        key = (config_file, self._mtime(config_file), storage_dir,
+               cluster_name, self._mtime(pickle_file))
+        with self._lock:
+            if key not in self._clusters:
+                configurator = self.configurator(config_file, storage_dir)
+                self._clusters[key] = configurator.load_cluster(cluster_name)
+            return self._clusters[key]
+
+    def invalidate(self, config_file=None, storage_dir=None,
+                   cluster_name=None):
+        """Drop the cached items which match the received information.
+
+        If no information is provided all the items are dropped.
+        """
+        def match(key):
+            """Check if the received key should be dropped."""
+            return ((config_file is None or key[0] == config_file) and
+                    (storage_dir is None or key[2] == storage_dir) and
+                    (cluster_name is None or len(key) < 4 or
+                     key[3] == cluster_name))
+
+        with self._lock:
+            if cluster_name is None:
+                stale = [item for item in self._configs if match(item)]
+                for key in stale:
+                    del self._configs[key]
+            stale = [item for item in self._clusters if match(item)]
+            for key in stale:
+                del self._clusters[key]
+
+
+_CACHE = _ConfigCache()
+
+
+def invalidate_cache(config_file=None, storage_dir=None, cluster_name=None):
+    """Drop the cached Elasticluster configurations and clusters which
+    match the received information.
+    """
+    _CACHE.invalidate(config_file, storage_dir, cluster_name)
 
 
 class ElastiCluster(object):
@@ -46,6 +145,7 @@ class ElastiCluster(object):
         self._config = None
         self._config_file = constant.PATH.EC_CONFIG.format(
             provider=provider)
+        self._storage_dir = None
 
     @property
     def config(self):
@@ -60,13 +160,8 @@ class ElastiCluster(object):
         # TODO(alexandrucoman): Change `storage` with a constant
         storage_dir = os.path.join(os.path.dirname(self._config_file),
                                    "storage")
-        try:
-            self._config = ec_conf.Configurator.fromConfig(
-                self._config_file, storage_dir)
-        except voluptuous.Error:
-            raise exception.InvalidConfig(
-                config_file=self._config_file,
-                storage_dir=storage_dir)
+        self._storage_dir = storage_dir
+        self._config = _CACHE.configurator(self._config_file, storage_dir)
 
     def get_config(self, cluster_name=None):
         """Get the config."""
@@ -85,7 +180,8 @@ class ElastiCluster(object):
         :param cluster_name: name of the cluster
         :return: :class elasticluster.cluster.cluster: instance
         """
-        return self._config.load_cluster(cluster_name)
+        return _CACHE.cluster(self._config_file, self._storage_dir,
+                              cluster_name)
 
     @classmethod
     def _add_common_options(cls, command, config=None):
@@ -132,10 +228,7 @@ class ElastiCluster(object):
     @classmethod
     def execute(cls, command, **kwargs):
         """Wrap elasticluster commands to avoid need to call separately."""
-        # Note: Sets NFS client parameters for elasticluster Ansible playbook.
-        #       Uses async clients which provide better throughput on
-        #       reads/writes: http://goo.gl/tGrGtE (section 5.9 for tradeoffs)
-        os.environ["nfsoptions"] = "rw,async,nfsvers=3"
+        os.environ["nfsoptions"] = _NFS_OPTIONS
         cls._add_common_options(command, **kwargs)
         cls._check_command(command)
         sys.argv = command
@@ -144,6 +237,11 @@ class ElastiCluster(object):
             return ec_main.main()
         except SystemExit as exc:
             return exc.args[0]
+        finally:
+            if set(command) & set((cls._EC_START, cls._EC_STOP,
+                                   cls._EC_SETUP)):
+                # The cluster repository was updated.
+                invalidate_cache()
 
     @classmethod
     def start(cls, cluster, config=None, no_setup=False):
@@ -209,6 +307,147 @@ class ElastiCluster(object):
         return cls.execute(command, config=config)
 
 
+class ClusterManager(object):
+
+    """In-process operations over the Elasticluster objects.
+
+    Unlike :class:`ElastiCluster`, the operations do not go through
+    the Elasticluster command line. The configuration is shared with
+    the process-wide cache and reloaded only when the configuration
+    file changes, and every operation returns a :class:`ClusterResult`.
+
+    Example:
+    ::
+        manager = ClusterManager(config="~/.bcbio/elasticluster/aws.config")
+        result = manager.start("bcbio")
+        if not result.status:
+            LOG.error("Failed to start the cluster: %s", result.error)
+    """
+
+    def __init__(self, config=None, storage=None, provider=None):
+        """
+        :param config:    Elasticluster config file
+        :param storage:   the directory used to store the information
+                          regarding the clusters
+        :param provider:  the name of the cloud provider
+        """
+        provider = provider or bcbio_config["env.BCBIO_PROVIDER"]
+        self._config_file = os.path.expanduser(
+            config or constant.PATH.EC_CONFIG.format(provider=provider))
+        self._storage = storage or _EC_STORAGE
+        os.environ["nfsoptions"] = _NFS_OPTIONS
+
+    @property
+    def config(self):
+        """Instance of :class Configurator:, reloaded when the
+        configuration file is changed.
+        """
+        return _CACHE.configurator(self._config_file, self._storage)
+
+    def get_cluster(self, cluster_name):
+        """Loads a cluster from the cluster repository.
+
+        :param cluster_name: name of the cluster
+        :return: :class elasticluster.cluster.cluster: instance
+        """
+        return _CACHE.cluster(self._config_file, self._storage,
+                              cluster_name)
+
+    @staticmethod
+    def _nodes(cluster):
+        """Return the name of the nodes from the received cluster
+        grouped by their kind.
+        """
+        if cluster is None:
+            return {}
+        return {kind: [node.name for node in nodes]
+                for kind, nodes in cluster.nodes.items()}
+
+    def _operation(self, name, cluster_name, operation):
+        """Run the received operation and return its result.
+
+        :param name:          the name of the operation
+        :param cluster_name:  the name of the cluster
+        :param operation:     a callable which receives the name of
+                              the cluster and returns the cluster and
+                              the status of the operation
+        """
+        cluster, status, error = None, False, None
+        start = time.time()
+        LOG.info("Running the %(operation)s operation on the %(cluster)r "
+                 "cluster.", {"operation": name, "cluster": cluster_name})
+        try:
+            cluster, status = operation(cluster_name)
+        except Exception as exc:    # pylint: disable=broad-except
+            LOG.debug("The %(operation)s operation on the %(cluster)r "
+                      "cluster failed: %(error)s",
+                      {"operation": name, "cluster": cluster_name,
+                       "error": exc})
+            error = exc
+
+        if name in ("start", "stop"):
+            _CACHE.invalidate(self._config_file, self._storage, cluster_name)
+
+        return ClusterResult(cluster=cluster_name, operation=name,
+                             status=bool(status),
+                             nodes=self._nodes(cluster),
+                             duration=time.time() - start, error=error)
+
+    def _start(self, cluster_name, no_setup):
+        """Create the cluster, start its nodes and configure them."""
+        pickle_file = os.path.join(self._storage,
+                                   "%s.pickle" % cluster_name)
+        if os.path.exists(pickle_file):
+            LOG.debug("Removing pickle file: %s", pickle_file)
+            os.remove(pickle_file)
+
+        cluster = self.config.create_cluster(cluster_name, cluster_name)
+        cluster.start()
+        if no_setup:
+            return cluster, True
+        return cluster, cluster.setup()
+
+    def _stop(self, cluster_name, force):
+        """Stop all the nodes of the cluster."""
+        cluster = self.get_cluster(cluster_name)
+        cluster.stop(force=force)
+        return cluster, True
+
+    def _setup(self, cluster_name):
+        """Configure all the nodes of the cluster."""
+        cluster = self.get_cluster(cluster_name)
+        return cluster, cluster.setup()
+
+    def start(self, cluster, no_setup=False):
+        """Create a cluster using the supplied configuration.
+
+        :param cluster:   Type of cluster. It refers to a
+                          configuration stanza [cluster/<name>].
+        :param no_setup:  Only start the cluster, do not configure it.
+        """
+        return self._operation(
+            "start", cluster, lambda name: self._start(name, no_setup))
+
+    def stop(self, cluster, force=False):
+        """Stop a cluster and all associated VM instances.
+
+        :param cluster:     Type of cluster. It refers to a
+                            configuration stanza [cluster/<name>].
+        :param force:       Remove the cluster even if not all the nodes
+                            have been terminated properly.
+        """
+        return self._operation(
+            "stop", cluster, lambda name: self._stop(name, force))
+
+    def setup(self, cluster):
+        """Configure the cluster.
+
+        :param cluster:     Type of cluster. It refers to a
+                            configuration stanza [cluster/<name>].
+        """
+        return self._operation("setup", cluster, self._setup)
+
+
 class SilentPlaybook(ansible.callbacks.PlaybookCallbacks):
 
     """
@@ -253,6 +492,171 @@ class SilentPlaybook(ansible.callbacks.PlaybookCallbacks):
                   {"stats": stats})
 
 
+class PlaybookTimings(object):
+
+    """Collect the time spent by a playbook on each task and host.
+
+    The time spent on each host is computed in the main process, when
+    the results of a task are aggregated, using the moment when the
+    task finished on the host. The moment is recorded in the result
+    of the host by the runner callbacks, which are executed in the
+    worker processes when Ansible uses more than one fork.
+    """
+
+    # The key used for sending the finish time from the workers.
+    FINISHED = "_bcbiovm_finished"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._task = None
+        self._task_start = None
+        self.tasks = []
+        self.hosts = collections.defaultdict(float)
+        self.task_hosts = []
+
+    def __getstate__(self):
+        # Note: The timings are sent back to the parent process when
+        #       the playbook runs in a worker process.
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def task_start(self, name):
+        """Mark the beginning of a new task."""
+        with self._lock:
+            self._end_task()
+            self._task, self._task_start = name, time.time()
+
+    @classmethod
+    def mark_finished(cls, result):
+        """Record in the received host result the moment when the
+        task finished.
+        """
+        if isinstance(result, dict):
+            result[cls.FINISHED] = time.time()
+
+    def host_done(self, host, finished=None):
+        """Mark the end of the current task on the received host.
+
+        :param finished:    the moment when the task finished on the
+                            host (defaults to now)
+        """
+        with self._lock:
+            if self._task is None:
+                return
+            if finished is None:
+                finished = time.time()
+            duration = max(0.0, finished - self._task_start)
+            self.hosts[host] += duration
+            self.task_hosts.append((self._task, host, duration))
+
+    def results_done(self, results):
+        """Mark the end of the current task using the results received
+        from the Ansible runner.
+        """
+        results = results or {}
+        for status in ("contacted", "dark"):
+            for host, result in (results.get(status) or {}).items():
+                finished = None
+                if isinstance(result, dict):
+                    finished = result.pop(self.FINISHED, None)
+                    if finished is None and result.get("skipped"):
+                        finished = self._task_start
+                self.host_done(host, finished)
+
+    def _end_task(self):
+        """Record the duration of the current task."""
+        if self._task is not None:
+            self.tasks.append((self._task, time.time() - self._task_start))
+        self._task, self._task_start = None, None
+
+    def finish(self):
+        """Mark the end of the playbook."""
+        with self._lock:
+            self._end_task()
+
+    def slowest_tasks(self, count=None):
+        """Return the slowest tasks as (task, duration) tuples."""
+        count = count or bcbio_config["ansible.slowest"]
+        return sorted(self.tasks, key=lambda item: item[1],
+                      reverse=True)[:count]
+
+    def slowest_hosts(self, count=None):
+        """Return the slowest hosts as (host, duration) tuples."""
+        count = count or bcbio_config["ansible.slowest"]
+        return sorted(self.hosts.items(), key=lambda item: item[1],
+                      reverse=True)[:count]
+
+
+class _TimedCallbacks(object):
+
+    """Proxy over the Ansible callbacks which records the time spent
+    on each task and host.
+
+    Note: The runner callbacks (`on_ok`, `on_failed`, ...) are executed
+    in the worker processes, so they only mark the finish time in the
+    result of the host, which is sent back to the main process.
+    """
+
+    _HOST_EVENTS = ("on_ok", "on_failed", "on_unreachable",
+                    "on_async_ok", "on_async_failed")
+
+    def __init__(self, callbacks, timings):
+        object.__setattr__(self, "_callbacks", callbacks)
+        object.__setattr__(self, "_timings", timings)
+
+    def __getattr__(self, name):
+        attribute = getattr(self._callbacks, name)
+        if name not in self._HOST_EVENTS:
+            return attribute
+
+        def _host_event(host, result=None, *args, **kwargs):
+            """Record the end of the task on the host."""
+            PlaybookTimings.mark_finished(result)
+            return attribute(host, result, *args, **kwargs)
+
+        return _host_event
+
+    def __setattr__(self, name, value):
+        # Note: Ansible sets attributes like `playbook`, `task` or
+        #       `runner` on the callbacks.
+        setattr(self._callbacks, name, value)
+
+    def on_task_start(self, name, is_conditional):
+        """Callback for `task_start` event."""
+        self._timings.task_start(name)
+        return self._callbacks.on_task_start(name, is_conditional)
+
+    def on_setup(self):
+        """Callback for `setup` event."""
+        self._timings.task_start("setup")
+        return self._callbacks.on_setup()
+
+
+class _TimedStats(object):
+
+    """Proxy over the Ansible stats which computes the time spent on
+    each host when the results of a task are aggregated in the main
+    process.
+    """
+
+    def __init__(self, stats, timings):
+        self._stats = stats
+        self._timings = timings
+
+    def __getattr__(self, name):
+        return getattr(self._stats, name)
+
+    def compute(self, runner_results, *args, **kwargs):
+        """Aggregate the results of a task."""
+        self._timings.results_done(runner_results)
+        return self._stats.compute(runner_results, *args, **kwargs)
+
+
 class AnsiblePlaybook(object):
 
     """
@@ -263,6 +667,14 @@ class AnsiblePlaybook(object):
     CONFIG = 'ANSIBLE_CONFIG'
     TEMP_CONFIG = 'ANSIBLE_TEMP_CONFIG'
     HOST_KEY_CHECKING = 'ANSIBLE_HOST_KEY_CHECKING'
+    SSH_ARGS = 'ANSIBLE_SSH_ARGS'
+
+    # Note: The performance profile is shared by all the playbooks
+    #       running in the current process, so it is applied when the
+    #       first playbook starts and removed when the last one ends.
+    _profile_lock = threading.Lock()
+    _profile_users = 0
+    _profile_backup = {}
 
     def __init__(self, inventory_path, playbook_path, config=None,
                  cluster=None, extra_vars=None, ansible_cfg=None,
@@ -279,11 +691,14 @@ class AnsiblePlaybook(object):
         self._host_list = inventory_path
         self._playbook = playbook_path
         self._ansible_cfg = ansible_cfg
+        self._ssh_args_backup = None
 
         self._callbacks = None
         self._cluster = None
         self._stats = None
         self._runner_cb = None
+        self.duration = None
+        self.timings = None
 
         if config and cluster:
             ecluster = ElastiCluster(provider or
@@ -325,11 +740,112 @@ class AnsiblePlaybook(object):
 
         return {}
 
+    @staticmethod
+    def _ssh_args():
+        """Return the SSH arguments used by Ansible extended with the
+        `ansible.control_persist` option or None if the configured
+        arguments already contain it.
+        """
+        ssh_args = (os.environ.get(AnsiblePlaybook.SSH_ARGS) or
+                    getattr(ansible.constants, "ANSIBLE_SSH_ARGS", None) or
+                    "")
+        if "ControlPersist" in ssh_args:
+            return None
+
+        return " ".join(
+            arg for arg in (ssh_args, "-o ControlMaster=auto",
+                            "-o ControlPersist=%s" %
+                            bcbio_config["ansible.control_persist"])
+            if arg)
+
+    @staticmethod
+    def profile():
+        """Return the environment variables which describe the Ansible
+        performance profile from the bcbiovm configuration.
+        """
+        environment = {
+            "ANSIBLE_SSH_PIPELINING": str(bool(
+                bcbio_config["ansible.pipelining"])),
+        }
+        if bcbio_config["ansible.control_persist"]:
+            ssh_args = AnsiblePlaybook._ssh_args()
+            if ssh_args:
+                environment[AnsiblePlaybook.SSH_ARGS] = ssh_args
+        if bcbio_config["ansible.gathering"]:
+            environment["ANSIBLE_GATHERING"] = bcbio_config[
+                "ansible.gathering"]
+        if bcbio_config["ansible.fact_caching"]:
+            environment.update({
+                "ANSIBLE_CACHE_PLUGIN": bcbio_config["ansible.fact_caching"],
+                "ANSIBLE_CACHE_PLUGIN_CONNECTION": bcbio_config[
+                    "ansible.fact_caching_connection"],
+                "ANSIBLE_CACHE_PLUGIN_TIMEOUT": str(bcbio_config[
+                    "ansible.fact_caching_timeout"]),
+            })
+        return environment
+
+    @classmethod
+    def _apply_profile(cls):
+        """Export the performance profile for the Ansible playbooks."""
+        with cls._profile_lock:
+            cls._profile_users += 1
+            if cls._profile_users > 1:
+                return
+
+            for variable, value in cls.profile().items():
+                cls._profile_backup[variable] = os.environ.get(variable)
+                os.environ[variable] = value
+            reload(ansible.constants)
+
+    @classmethod
+    def _remove_profile(cls):
+        """Restore the environment changed by the performance profile."""
+        with cls._profile_lock:
+            cls._profile_users -= 1
+            if cls._profile_users > 0:
+                return
+
+            for variable, value in cls._profile_backup.items():
+                if value is None:
+                    os.environ.pop(variable, None)
+                else:
+                    os.environ[variable] = value
+            cls._profile_backup.clear()
+            reload(ansible.constants)
+
+    def _forks(self):
+        """Return the number of parallel processes used by Ansible.
+
+        If it is not provided by the configuration, the number of forks
+        is the number of hosts from the inventory, without exceeding
+        the `ansible.max_forks` limit.
+        """
+        if bcbio_config["ansible.forks"]:
+            return bcbio_config["ansible.forks"]
+
+        hosts = set()
+        try:
+            with open(self._host_list, "r") as file_handle:
+                for line in file_handle:
+                    line = line.strip()
+                    if line and not line.startswith(("[", "#")):
+                        hosts.add(line.split()[0])
+        except (IOError, OSError, TypeError):
+            return constant.ANSIBLE.FORKS
+
+        return max(1, min(len(hosts), bcbio_config["ansible.max_forks"]))
+
     def prologue(self):
         """Setup the environment before playbook run."""
         LOG.debug("Setup the environment before playbook run.")
         os.environ[self.HOST_KEY_CHECKING] = constant.ANSIBLE.KEY_CHECKING
+        self._apply_profile()
         if self._ansible_cfg:
+            # Note: The environment variables take precedence over the
+            #       config file, so the SSH arguments from the received
+            #       config (proxies, ssh_config files) should not be
+            #       replaced by the ones from the performance profile.
+            self._ssh_args_backup = os.environ.pop(self.SSH_ARGS, None)
             os.environ[self.TEMP_CONFIG] = os.environ.get(self.CONFIG)
             os.environ[self.CONFIG] = self._ansible_cfg
             reload(ansible.constants)
@@ -337,12 +853,16 @@ class AnsiblePlaybook(object):
     def epilogue(self):
         """Cleanup the environment after playbook run."""
         LOG.debug("Cleanup the environment after playbook run.")
+        self._remove_profile()
         if self._ansible_cfg:
             old_ansible_cfg = os.environ.pop(self.TEMP_CONFIG, None)
             if old_ansible_cfg:
                 os.environ[self.CONFIG] = old_ansible_cfg
             else:
                 del os.environ[self.CONFIG]
+            if self._ssh_args_backup is not None:
+                os.environ[self.SSH_ARGS] = self._ssh_args_backup
+                self._ssh_args_backup = None
             reload(ansible.constants)
 
     def _run(self):
@@ -359,18 +879,20 @@ class AnsiblePlaybook(object):
         if self._cluster:
             private_key = self._cluster['login']['user_key_private']
 
+        self.timings = PlaybookTimings()
         playbook = ansible.playbook.PlayBook(
             playbook=self._playbook,
             module_path=_EC_ANSIBLE_LIBRARY,
             extra_vars=self._extra_vars,
             host_list=self._host_list,
             private_key_file=private_key,
-            callbacks=self._callbacks,
-            runner_callbacks=self._runner_cb,
-            forks=constant.ANSIBLE.FORKS,
-            stats=self._stats
+            callbacks=_TimedCallbacks(self._callbacks, self.timings),
+            runner_callbacks=_TimedCallbacks(self._runner_cb, self.timings),
+            forks=self._forks(),
+            stats=_TimedStats(self._stats, self.timings)
         )
         status = playbook.run()
+        self.timings.finish()
 
         unreachable = []
         failures = {}
@@ -395,9 +917,20 @@ class AnsiblePlaybook(object):
         :return: A tuple with two dictionaries. The first dictionary
                  contains information regarding unreachable hosts and
                  the second one contains information regarding failures.
+                 The time spent on each task and host is available in
+                 the `timings` attribute (:class:`PlaybookTimings`).
         """
         self.prologue()
-        response = self._run()
-        self.epilogue()
-
+        start = time.time()
+        try:
+            response = self._run()
+        finally:
+            self.duration = time.time() - start
+            self.epilogue()
+
+        LOG.info("The %(playbook)r playbook finished in %(duration).2fs.",
+                 {"playbook": self._playbook, "duration": self.duration})
+        for task, duration in self.timings.slowest_tasks():
+            LOG.debug("Task %(task)r took %(duration).2fs.",
+                      {"task": task, "duration": duration})
         return response
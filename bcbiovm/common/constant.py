@@ -30,6 +30,10 @@ class PATH:
 
     ANSIBLE_BASE = os.path.join(sys.prefix, "share", "bcbio-vm", "ansible")
     BCBIO = os.path.join(os.path.expanduser("~"), '.bcbio')
+    # Note: The config files are loaded in this order, the values from
+    # the latter files take precedence.
+    CONFIG = (os.path.join(os.sep, "etc", "bcbio", "bcbiovm.yaml"),
+              os.path.join(BCBIO, "bcbiovm.yaml"))
     EC = os.path.join(BCBIO, "elasticluster")
     EC_CONFIG = os.path.join(EC, "{provider}.config")
 
@@ -54,14 +58,43 @@ class SSH:
 
 
 DEFAULTS = {
+    "ansible.control_persist": "60s",
+    # Note: Opt-in, Elasticluster reuses the host names (frontend001,
+    # compute001, ...) across clusters, so the cached facts can belong
+    # to a previous cluster.
+    "ansible.fact_caching": None,
+    "ansible.fact_caching_connection": os.path.join(PATH.EC, "facts"),
+    "ansible.fact_caching_timeout": 86400,
+    "ansible.forks": None,
+    "ansible.gathering": "smart",
+    "ansible.max_forks": 100,
+    # Note: Opt-in, pipelining breaks sudo on the hosts which require
+    # a tty (requiretty).
+    "ansible.pipelining": False,
+    "ansible.slowest": 10,
     "bcbio.repo": "https://github.com/chapmanb/bcbio-nextgen.git",
     "bcbio.branch": "master",
     "docker.image": "bcbio/bcbio",
     "docker.bcbio_image": "bcbio-nextgen-docker-image.gz",
+    # Note: Only the json and yaml formats are accepted.
+    "docker.runfn_format": "json",
     "env.BCBIO_PROVIDER": PROVIDER.AWS,
+    "graph.resample": None,
+    "graph.aggregations": ("min", "mean", "max"),
+    "icel.template_cache": os.path.join(PATH.BCBIO, "cache", "icel"),
     "log.verbosity": 0,
     "log.file.level": logging.DEBUG,
     "log.file.format": "%(asctime)s,%(name)s,%(levelname)s,%(message)s",
+    "log.queue.enabled": False,
+    "log.queue.handlers": ("file_handler", ),
+    "log.queue.policy": "block",
+    "log.queue.size": 10000,
+    "log.queue.timeout": 1.0,
+    "misc.backoff": 1,
+    "misc.jitter": 0,
+    "misc.max_retry_interval": 60,
+    "misc.workers": 4,
+    "runfn.format": "json",
     "supported.genomes": ["GRCh37", "hg19", "hg38", "hg38-noalt", "mm10",
                           "mm9", "rn6", "rn5", "canFam3", "dm3", "galGal4",
                           "phix", "pseudomonas_aeruginosa_ucbpp_pa14",
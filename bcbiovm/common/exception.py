@@ -52,6 +52,24 @@ class NotSupported(BCBioException):
     template = "%(feature)s is not available in %(context)s."
 
 
+class ProcessTimeout(BCBioException):
+
+    """The process did not finish in the received amount of time."""
+
+    template = "Command %(command)r did not finish in %(timeout)s seconds."
+
+
+class CommandsFailed(BCBioException):
+
+    """One or more commands from a batch failed."""
+
+    template = "%(failed)d of %(total)d commands failed: %(commands)s"
+
+    def __init__(self, message=None, **kwargs):
+        self.results = kwargs.get("results", [])
+        super(CommandsFailed, self).__init__(message, **kwargs)
+
+
 class InvalidConfig(BCBioException):
 
     """Not available or invalid configuration."""
@@ -0,0 +1,35 @@
+"""Import related utilities and helper functions."""
+
+import importlib
+
+import six
+
+
+def import_class(import_str):
+    """Return a class (or any other module attribute) from a string
+    including the module and the attribute name.
+
+    Example:
+    ::
+        provider = import_class(
+            "bcbiovm.provider.aws.aws_provider.AWSProvider")
+
+    :raises: ImportError
+    """
+    module_name, _, class_name = import_str.rpartition(".")
+    module = importlib.import_module(module_name)
+    try:
+        return getattr(module, class_name)
+    except AttributeError:
+        raise ImportError("Class %(class)s cannot be found in %(module)s" %
+                          {"class": class_name, "module": module_name})
+
+
+def resolve(item):
+    """Return the object described by the received item.
+
+    The item can be the object itself or the import path of the object.
+    """
+    if isinstance(item, six.string_types):
+        return import_class(item)
+    return item
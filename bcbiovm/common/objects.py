@@ -1,15 +1,66 @@
 """Common objects used across the bcbio-vm project."""
 
 
+import abc
+import codecs
 import collections
+import io
 import json
+
 import prettytable
+import six
 
 from bcbiovm.common import exception as exc
 
 
 Flavor = collections.namedtuple("Flavor", ["cpus", "memory"])
 
+# Note: Marks the values missing from the items without a default value.
+_MISSING = object()
+
+
+def _make_index(fields):
+    """Return the position of each field, keyed by the field name."""
+    return {field["name"]: position for position, field in enumerate(fields)}
+
+
+def _make_row(fields, item, index=None):
+    """Return the row described by the received item.
+
+    :param fields:  the list of fields from the container
+    :param item:    a dictionary, a list or a tuple with the values
+                    for each field or a value for single field
+                    containers
+    :param index:   the position of each field, keyed by the field
+                    name (built from the fields if it is not provided)
+
+    :raises: bcbiovm.exception.BCBioException
+    """
+    if isinstance(item, dict):
+        if index is None:
+            index = _make_index(fields)
+        row = [field.get("default", _MISSING) for field in fields]
+        for field_name, value in item.items():
+            position = index.get(field_name)
+            if position is not None:
+                row[position] = value
+        for position, value in enumerate(row):
+            if value is _MISSING:
+                raise exc.BCBioException("The field %(field)r is missing.",
+                                         field=fields[position]["name"])
+        return row
+
+    elif isinstance(item, (list, tuple)):
+        if len(item) == len(fields):
+            return item
+        raise exc.BCBioException("Invalid number of fields.")
+
+    elif len(fields) == 1:
+        return [item]
+
+    raise exc.BCBioException("Unknown item type %(item_type)r.",
+                             item_type=type(item))
+
 
 class ReportMixin(object):
 
@@ -67,6 +118,13 @@ class Report(ReportMixin):
         value = self.json(indent=False) or "Unknown format"
         return "<Report: {}>".format(value)
 
+    def write(self, writer):
+        """Write all the sections from the report using the received
+        stream writer (:class:`JSONLinesWriter` or :class:`TextWriter`).
+        """
+        for container in self._data.values():
+            container.write(writer)
+
     def text(self):
         chunks = []
         for name, container in self._data.items():
@@ -78,9 +136,55 @@ class Report(ReportMixin):
         return "\n\n".join(chunks)
 
 
+class Row(object):
+
+    """Read-only view over a row from a :class:`Container`.
+
+    The values are read from the columns of the container, so the view
+    does not copy the row. The values can be accessed by the name of
+    the field or by their position.
+    """
+
+    __slots__ = ("_container", "_position")
+
+    def __init__(self, container, position):
+        self._container = container
+        self._position = position
+
+    def __getitem__(self, key):
+        # pylint: disable=protected-access
+        if not isinstance(key, int):
+            key = self._container._position(key)
+        return self._container._columns[key][self._position]
+
+    def __len__(self):
+        # pylint: disable=protected-access
+        return len(self._container._columns)
+
+    def __iter__(self):
+        # pylint: disable=protected-access
+        for column in self._container._columns:
+            yield column[self._position]
+
+    def __repr__(self):
+        return "<Row: {}>".format(list(self))
+
+    def values(self):
+        """Return a list with the values from the current row."""
+        return list(self)
+
+    def as_dict(self):
+        """Return a dictionary with the values of each field."""
+        return dict(zip(self._container.field_names, self))
+
+
 class Container(ReportMixin):
 
-    """Simple container."""
+    """Simple container.
+
+    The values are stored in columns (one list for each field) in order
+    to keep large containers compact and cheap to sort or filter.
+    """
 
     def __init__(self, name, title=None, description=None, fields=None):
         """
@@ -90,17 +194,18 @@ class Container(ReportMixin):
         :param fields:          a list of dictionaris which contains
                                 information for fields setup.
         """
-        self._data = {
-            "meta": {"name": name, "title": title,
-                     "description": description, "fields": []},
-            "content": []}
+        self._meta = {"name": name, "title": title,
+                      "description": description, "fields": []}
+        self._columns = []
+        self._index = {}
+        self._length = 0
 
         for field in fields or []:
             self.add_field(**field)
 
     def __str__(self):
         """String representation for current container."""
-        value = "<Container: {}>".format(self._data["meta"]["name"])
+        value = "<Container: {}>".format(self._meta["name"])
         return value
 
     def __repr__(self):
@@ -108,61 +213,375 @@ class Container(ReportMixin):
         value = self.json(indent=False) or "Unknown format"
         return "<Container: {}>".format(value)
 
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        return self.rows()
+
+    def __getitem__(self, position):
+        if position < 0:
+            position += self._length
+        if not 0 <= position < self._length:
+            raise IndexError("Container index out of range.")
+        return Row(self, position)
+
+    @property
+    def _data(self):
+        """The dictionary representation of the container."""
+        return {"meta": self._meta, "content": self._content()}
+
+    @property
+    def field_names(self):
+        """The names of the fields, in order."""
+        return [field["name"] for field in self._meta["fields"]]
+
+    def _content(self):
+        """Return the values from the container as a list of rows."""
+        if not self._columns:
+            return [[] for _ in range(self._length)]
+        return [list(row) for row in zip(*self._columns)]
+
     def add_field(self, name, title=None, **kwargs):
         """Create or update an existing field.
 
+        The rows already present in the container get the default
+        value of the field (or None).
+
         :param name:    the name of the field
         :param title:   the label used for this field
         """
         field = {"name": name, "title": title}
         field.update(kwargs)
-        self._data["meta"]["fields"].append(field)
+        self._meta["fields"].append(field)
+        self._index[name] = len(self._columns)
+        self._columns.append([field.get("default")] * self._length)
+
+    @classmethod
+    def _from_columns(cls, meta, columns, length):
+        """Return a new container with the received metadata and values.
+
+        :param meta:     the metadata of the container (name, title,
+                         description and fields)
+        :param columns:  a list with the values of each field
+        :param length:   the number of rows
+        """
+        container = cls(meta["name"], meta["title"], meta["description"],
+                        meta["fields"])
+        container._columns = columns
+        container._length = length
+        return container
+
+    def _position(self, name):
+        """Return the position of the column for the received field.
+
+        :raises: bcbiovm.exception.BCBioException
+        """
+        try:
+            return self._index[name]
+        except KeyError:
+            raise exc.BCBioException("The field %(field)r is missing.",
+                                     field=name)
+
+    def _append(self, row):
+        """Append the values from the received row to the columns."""
+        for column, value in zip(self._columns, row):
+            column.append(value)
+        self._length += 1
 
     def add_items(self, items):
-        """Add multiple items into container."""
+        """Add multiple items into container.
+
+        The lists and the tuples with the right number of values are
+        added column by column, without building intermediary rows.
+
+        :raises: bcbiovm.exception.BCBioException
+        """
+        fields = self._meta["fields"]
+        width = len(fields)
+        batch = []
         for item in items:
-            self.add_item(item)
+            if isinstance(item, (list, tuple)) and len(item) == width:
+                batch.append(item)
+            else:
+                batch.append(_make_row(fields, item, self._index))
+
+        if not batch:
+            return
+        for column, values in zip(self._columns, zip(*batch)):
+            column.extend(values)
+        self._length += len(batch)
 
     def add_item(self, item):
         """Add a new item into container.
 
         :raises: bcbiovm.exception.BCBioException
         """
-        if isinstance(item, dict):
-            row = []
-            for field in self._data["meta"]["fields"]:
-                field_name = field.get("name")
-                if field_name in item:
-                    row.append(item[field_name])
-                elif "default" in field:
-                    row.append(field["default"])
-                else:
-                    raise exc.BCBioException("The field %(field)r is mising.",
-                                             field=field_name)
-            self._data["content"].append(row)
-
-        elif isinstance(item, (list, tuple)):
-            if len(item) == len(self._data["meta"]["fields"]):
-                self._data["content"].append(item)
-            else:
-                raise exc.BCBioException("Invalid number of fields.")
+        self._append(_make_row(self._meta["fields"], item, self._index))
 
-        elif len(self._data["meta"]["fields"]) == 1:
-            self._data["content"].append([item])
+    def rows(self):
+        """Iterate over the rows from the container."""
+        for position in range(self._length):
+            yield Row(self, position)
 
+    def column(self, name):
+        """Return a copy of the values from the received field.
+
+        :raises: bcbiovm.exception.BCBioException
+        """
+        return list(self._columns[self._position(name)])
+
+    def sort(self, key, reverse=False):
+        """Sort the rows from the container in place.
+
+        :param key:     the name of a field or a function which receives
+                        a :class:`Row` and returns the comparison key
+        :param reverse: whether or not to sort in descending order
+
+        :raises: bcbiovm.exception.BCBioException
+        """
+        if callable(key):
+            order = sorted(range(self._length),
+                           key=lambda position: key(Row(self, position)),
+                           reverse=reverse)
         else:
-            raise exc.BCBioException("Unknown item type %(item_type)r.",
-                                     item_type=type(item))
+            column = self._columns[self._position(key)]
+            order = sorted(range(self._length), key=column.__getitem__,
+                           reverse=reverse)
+
+        self._columns = [[values[position] for position in order]
+                         for values in self._columns]
+        return self
+
+    def filter(self, predicate=None, **values):
+        """Return a new container with the rows which match the received
+        predicate and have the received values.
+
+        Example:
+        ::
+            running = container.filter(state="running")
+            large = container.filter(lambda row: row["cpus"] > 16)
+
+        :param predicate:   a function which receives a :class:`Row`
+                            and returns True for the rows which
+                            should be kept
+        :param values:      the expected value for each field
+
+        :raises: bcbiovm.exception.BCBioException
+        """
+        positions = range(self._length)
+        for name, value in values.items():
+            column = self._columns[self._position(name)]
+            positions = [position for position in positions
+                         if column[position] == value]
+        if predicate is not None:
+            positions = [position for position in positions
+                         if predicate(Row(self, position))]
+
+        return self._from_columns(
+            self._meta,
+            [[field_values[position] for position in positions]
+             for field_values in self._columns],
+            len(positions))
+
+    def write(self, writer):
+        """Write the container using the received stream writer.
+
+        For the fixed-width writers, the fields without an explicit
+        width get the width of their longest value.
+        """
+        fields = []
+        for field, column in zip(self._meta["fields"], self._columns):
+            field = dict(field)
+            if writer.fixed_width and "width" not in field:
+                field["width"] = max(
+                    [len(six.text_type(field["name"]))] +
+                    [len(six.text_type(value)) for value in column])
+            fields.append(field)
+
+        section = writer.add_section(self._meta["name"], self._meta["title"],
+                                     self._meta["description"], fields)
+        section.add_items(zip(*self._columns))
 
     def text(self):
         """Return a pretty text table from the available data."""
-        columns = [field["name"] for field in self._data["meta"]["fields"]]
-        table = prettytable.PrettyTable(columns)
-        for row in self._data["content"]:
-            table.add_row(row)
+        table = prettytable.PrettyTable(self.field_names)
+        for row in zip(*self._columns):
+            table.add_row(list(row))
         return str(table)
 
 
+class _StreamSection(object):
+
+    """A section whose items are written as soon as they are added."""
+
+    def __init__(self, writer, name, fields):
+        self._writer = writer
+        self.name = name
+        self.fields = fields
+        self._index = _make_index(fields)
+
+    def add_item(self, item):
+        """Write a new item.
+
+        :raises: bcbiovm.exception.BCBioException
+        """
+        self._writer.write_row(self, _make_row(self.fields, item,
+                                               self._index))
+
+    def add_items(self, items):
+        """Write multiple items."""
+        for item in items:
+            self.add_item(item)
+
+
+@six.add_metaclass(abc.ABCMeta)
+class StreamWriter(object):
+
+    """Base class for the writers which render the sections and the
+    items of a report incrementally, without keeping them in memory.
+
+    Example:
+    ::
+        with open("instances.jsonl", "w") as file_handle:
+            writer = JSONLinesWriter(file_handle)
+            section = writer.add_section(
+                "instance", fields=[{"name": "name"}, {"name": "ip"}])
+            for instance in instances:
+                section.add_item([instance.name, instance.ip])
+            writer.close()
+    """
+
+    # Whether or not the writer requires the width of each field.
+    fixed_width = False
+
+    def __init__(self, file_handle):
+        if six.PY2 and not isinstance(file_handle, io.TextIOBase):
+            # Note: The byte streams (a file or a piped stdout) accept
+            #       only ASCII text on Python 2.
+            file_handle = codecs.getwriter("utf-8")(file_handle)
+        self._file = file_handle
+        self._section = None
+
+    def add_section(self, name, title=None, description=None, fields=None):
+        """Start a new section and return it."""
+        self.end_section()
+        self._section = _StreamSection(self, name, list(fields or []))
+        self.write_section(self._section, title, description)
+        return self._section
+
+    @abc.abstractmethod
+    def write_section(self, section, title, description):
+        """Write the header of the received section."""
+        pass
+
+    @abc.abstractmethod
+    def write_row(self, section, row):
+        """Write a row from the received section."""
+        pass
+
+    def end_section(self):
+        """Write the end of the current section, if any."""
+        self._section = None
+
+    def close(self):
+        """Finish the current section and flush the output."""
+        self.end_section()
+        self._file.flush()
+
+
+class JSONLinesWriter(StreamWriter):
+
+    """Write the report as JSON Lines: one object for the header of
+    each section and one object for each row.
+    """
+
+    def _write(self, data):
+        """Write the received data as a JSON line."""
+        self._file.write(json.dumps(data, default=six.text_type))
+        self._file.write("\n")
+
+    def write_section(self, section, title, description):
+        """Write the header of the received section."""
+        self._write({"type": "section", "name": section.name,
+                     "title": title, "description": description,
+                     "fields": section.fields})
+
+    def write_row(self, section, row):
+        """Write a row from the received section."""
+        self._write({"type": "row", "section": section.name,
+                     "values": list(row)})
+
+
+class TextWriter(StreamWriter):
+
+    """Write the report as fixed-width text tables.
+
+    The width of each column is taken from the `width` key of
+    the field description; longer values are truncated.
+    """
+
+    DEFAULT_WIDTH = 20
+    fixed_width = True
+
+    def __init__(self, file_handle, default_width=None, verbose=False):
+        """
+        :param file_handle:     the stream which receives the tables
+        :param default_width:   the width of the fields without
+                                an explicit width
+        :param verbose:         whether or not to write the title and
+                                the description of each section
+        """
+        super(TextWriter, self).__init__(file_handle)
+        self._default_width = default_width or self.DEFAULT_WIDTH
+        self._verbose = verbose
+        self._widths = []
+        self._sections = 0
+
+    def _line(self, values):
+        """Write a table line with the received values."""
+        cells = []
+        for value, width in zip(values, self._widths):
+            value = six.text_type(value)
+            if len(value) > width:
+                value = value[:width - 1] + u"~" if width > 1 else value[:1]
+            cells.append(u" {} ".format(value.ljust(width)))
+        self._file.write(u"|{}|\n".format(u"|".join(cells)))
+
+    def _border(self):
+        """Write the table border."""
+        self._file.write("+{}+\n".format(
+            "+".join("-" * (width + 2) for width in self._widths)))
+
+    def write_section(self, section, title, description):
+        """Write the header of the received section."""
+        if self._sections:
+            self._file.write("\n")
+        self._sections += 1
+
+        self._widths = [field.get("width") or self._default_width
+                        for field in section.fields]
+        self._file.write("{}\n{}\n".format(section.name,
+                                           "=" * len(section.name)))
+        if self._verbose:
+            for text in (title, description):
+                if text:
+                    self._file.write(u"{}\n".format(text))
+        self._border()
+        self._line([field["name"] for field in section.fields])
+        self._border()
+
+    def write_row(self, section, row):
+        """Write a row from the received section."""
+        self._line(row)
+
+    def end_section(self):
+        """Write the bottom border of the current table."""
+        if self._section is not None:
+            self._border()
+        super(TextWriter, self).end_section()
+
+
 class ShippingConfig(object):
 
     """Store configuration for shipping to one storage service.
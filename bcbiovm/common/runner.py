@@ -0,0 +1,128 @@
+"""Run multiple external commands concurrently."""
+
+import collections
+import subprocess
+import threading
+import time
+
+from six.moves import queue
+
+from bcbiovm import config as global_config
+from bcbiovm import log as logging
+from bcbiovm.common import exception
+from bcbiovm.common import utils
+
+LOG = logging.get_logger(__name__)
+
+CommandResult = collections.namedtuple(
+    "CommandResult", ["command", "return_code", "stdout", "stderr",
+                      "duration", "error"])
+
+
+class CommandRunner(object):
+
+    """Run a batch of commands using a bounded number of workers.
+
+    Every command is executed through :func:`utils.execute` and the
+    keyword arguments received by the runner are passed to it. The
+    exit code of each command is recorded in its result, even if it
+    is accepted by `check_exit_code`.
+
+    Example:
+    ::
+        runner = CommandRunner(workers=4, check_exit_code=True)
+        results = runner.run([["ssh-add", key] for key in keys])
+    """
+
+    def __init__(self, workers=None, **kwargs):
+        """
+        :param workers:  the maximum number of commands executed
+                         at the same time
+        :param kwargs:   the arguments passed to :func:`utils.execute`
+        """
+        self._workers = workers or global_config.snapshot.misc.workers
+        self._execute_args = kwargs
+        self._execute_args["return_exit_code"] = True
+
+    def _execute(self, command):
+        """Execute the received command and return its result."""
+        error, return_code, stdout, stderr = None, None, None, None
+        start = time.time()
+        try:
+            stdout, stderr, return_code = utils.execute(
+                command, **self._execute_args)
+        except subprocess.CalledProcessError as exc:
+            error, return_code = exc, exc.returncode
+            stdout, stderr = exc.output
+        except Exception as exc:    # pylint: disable=broad-except
+            error, return_code = exc, None
+
+        result = CommandResult(command=command, return_code=return_code,
+                               stdout=stdout, stderr=stderr,
+                               duration=time.time() - start, error=error)
+        LOG.debug("The command %(command)r finished in %(duration).2fs "
+                  "with return code %(code)s.",
+                  {"command": command, "duration": result.duration,
+                   "code": return_code})
+        return result
+
+    def _worker(self, tasks, results):
+        """Execute the commands from the tasks queue until the queue
+        is empty.
+        """
+        while True:
+            try:
+                index, command = tasks.get_nowait()
+            except queue.Empty:
+                return
+            results[index] = self._execute(command)
+
+    def run(self, commands, check=True):
+        """Execute the received commands.
+
+        :param commands:  a list of commands
+        :param check:     whether or not to raise an exception if any
+                          of the commands failed
+
+        :return:          a list of :class:`CommandResult` in the same
+                          order as the received commands
+        :raises:          :class:`exception.CommandsFailed`
+        """
+        tasks = queue.Queue()
+        results = [None] * len(commands)
+        for index, command in enumerate(commands):
+            tasks.put((index, command))
+
+        workers = []
+        for _ in range(min(self._workers, len(commands))):
+            worker = threading.Thread(target=self._worker,
+                                      args=(tasks, results))
+            worker.daemon = True
+            worker.start()
+            workers.append(worker)
+
+        for worker in workers:
+            worker.join()
+
+        failed = [result for result in results if result.error]
+        if check and failed:
+            raise exception.CommandsFailed(
+                failed=len(failed), total=len(results),
+                commands=", ".join(repr(result.command)
+                                   for result in failed),
+                results=results)
+
+        return results
+
+
+def run(commands, workers=None, check=True, **kwargs):
+    """Execute the received commands concurrently.
+
+    :param commands:  a list of commands
+    :param workers:   the maximum number of commands executed
+                      at the same time
+    :param check:     whether or not to raise an exception if any
+                      of the commands failed
+    :param kwargs:    the arguments passed to :func:`utils.execute`
+    """
+    return CommandRunner(workers, **kwargs).run(commands, check=check)
@@ -0,0 +1,160 @@
+"""Read and write the YAML, JSON and msgpack documents used by bcbio-vm.
+
+The YAML documents are processed using the libyaml bindings when they
+are available and using the pure Python implementation otherwise.
+The documents are loaded and dumped in safe mode by default.
+
+YAML is used for the files edited by humans, while JSON and msgpack
+are compact interchange formats for the machine-generated files (the
+arguments and the results of the `runfn` calls).
+"""
+import json
+import os
+
+import yaml
+
+from bcbiovm.common import exception
+
+try:
+    from yaml import CSafeLoader as _SafeLoader
+    from yaml import CSafeDumper as _SafeDumper
+    from yaml import CLoader as _Loader
+    from yaml import CDumper as _Dumper
+    LIBYAML = True
+except ImportError:
+    from yaml import SafeLoader as _SafeLoader
+    from yaml import SafeDumper as _SafeDumper
+    from yaml import Loader as _Loader
+    from yaml import Dumper as _Dumper
+    LIBYAML = False
+
+JSON = "json"
+MSGPACK = "msgpack"
+YAML = "yaml"
+
+EXTENSIONS = {
+    JSON: ".json",
+    MSGPACK: ".msgpack",
+    YAML: ".yaml",
+}
+# Note: The files with other extensions are considered YAML documents.
+_FORMATS = {
+    ".json": JSON,
+    ".msgpack": MSGPACK,
+    ".yaml": YAML,
+    ".yml": YAML,
+}
+
+
+class SafeDumper(_SafeDumper):
+
+    """Safe dumper which represents the tuples as lists."""
+
+
+SafeDumper.add_representer(tuple, SafeDumper.represent_list)
+
+
+def get_format(path):
+    """Return the format of the received file based on its extension."""
+    _, extension = os.path.splitext(path)
+    return _FORMATS.get(extension.lower(), YAML)
+
+
+def get_extension(file_format):
+    """Return the file extension used for the received format.
+
+    :raises: bcbiovm.exception.NotSupported
+    """
+    try:
+        return EXTENSIONS[file_format]
+    except KeyError:
+        raise exception.NotSupported(
+            feature="The %r format" % file_format,
+            context="bcbiovm.common.serialization")
+
+
+def loads(content, safe=True):
+    """Return the object described by the received YAML document.
+
+    The machine-generated documents are usually JSON documents (which
+    are valid YAML documents as well), so they are parsed with the
+    JSON decoder first.
+
+    :param content:     the YAML or JSON document
+    :param safe:        whether or not to restrict the document to the
+                        standard YAML tags
+    """
+    if content.lstrip()[:1] in ("{", "["):
+        try:
+            return json.loads(content)
+        except ValueError:
+            pass
+    return yaml.load(content, Loader=_SafeLoader if safe else _Loader)
+
+
+def load(stream, safe=True):
+    """Return the object described by the YAML document from the
+    received stream.
+
+    :param stream:      a file-like object
+    :param safe:        whether or not to restrict the document to the
+                        standard YAML tags
+    """
+    return loads(stream.read(), safe=safe)
+
+
+def dump(data, stream=None, safe=True, **kwargs):
+    """Serialize the received object as a YAML document.
+
+    :param data:        the object which should be serialized
+    :param stream:      a file-like object; if it is not provided the
+                        document is returned
+    :param safe:        whether or not to use only the standard YAML tags
+    :param kwargs:      arguments passed to the YAML emitter
+    """
+    kwargs.setdefault("default_flow_style", False)
+    kwargs.setdefault("allow_unicode", False)
+    return yaml.dump(data, stream, Dumper=SafeDumper if safe else _Dumper,
+                     **kwargs)
+
+
+def read(path, safe=True):
+    """Return the object from the received file.
+
+    The format of the file is detected based on its extension. The
+    JSON files written as YAML documents are also accepted.
+    """
+    if get_format(path) == MSGPACK:
+        # Note: The msgpack module is imported only when it is required.
+        import msgpack
+
+        with open(path, "rb") as file_handle:
+            return msgpack.unpack(file_handle, raw=False)
+
+    with open(path, "r") as file_handle:
+        return load(file_handle, safe=safe)
+
+
+def write(data, path, safe=True, **kwargs):
+    """Write the received object in the received file.
+
+    The format of the file is detected based on its extension.
+
+    :param kwargs:  arguments passed to the YAML emitter or to the
+                    JSON encoder
+    """
+    file_format = get_format(path)
+    if file_format == MSGPACK:
+        import msgpack
+
+        with open(path, "wb") as file_handle:
+            msgpack.pack(data, file_handle, use_bin_type=True)
+        return path
+
+    with open(path, "w") as file_handle:
+        if file_format == JSON:
+            kwargs.setdefault("separators", (",", ":"))
+            json.dump(data, file_handle, **kwargs)
+        else:
+            dump(data, file_handle, safe=safe, **kwargs)
+    return path
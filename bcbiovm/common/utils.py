@@ -5,18 +5,22 @@ import collections
 import contextlib
 import datetime
 import os
+import random
 import shutil
 import subprocess
 import sys
 import tarfile
+import threading
 import time
 
 import paramiko
 import six
+from six.moves import queue
 
 from bcbiovm import log as logging
 from bcbiovm import config as global_config
 from bcbiovm.common import constant
+from bcbiovm.common import exception
 
 _SYMBOL = collections.namedtuple("Symbol", ["name", "set", "value"])
 _SYMBOLS = {
@@ -43,7 +47,8 @@ class SSHAgent(object):
         """Setup the SSH Agent at the beginning of the block created
         by the with statement.
 
-        :raise:
+        :raise: :class:`exception.CommandsFailed` if any of the keys
+                cannot be added
         """
         output, _ = execute(['ssh-agent', '-s'], check_exit_code=True)
         for line in output.splitlines():
@@ -53,8 +58,16 @@ class SSHAgent(object):
             value = value.split(';')[0]
             os.environ[key] = value
 
-        for key_path in self._keys:
-            execute(['ssh-add', key_path])
+        # Note: Imported here in order to avoid circular imports.
+        from bcbiovm.common import runner
+        try:
+            runner.run([['ssh-add', key_path] for key_path in self._keys],
+                       check=True)
+        except exception.CommandsFailed:
+            # Note: The __exit__ method is not called when __enter__
+            #       fails, so the agent should be stopped here.
+            execute(['ssh-agent', '-k'])
+            raise
 
     def __exit__(self, exception_type, exception_value, traceback):
         execute(['ssh-agent', '-k'])
@@ -226,12 +239,94 @@ def write_file(path, content, permissions=0o644, open_mode="wb", utime=None):
     return True
 
 
+def _read_lines(name, pipe, output):
+    """Put the lines read from the received pipe in the output queue.
+
+    The end of the stream is marked by a `(name, None)` item.
+    """
+    try:
+        for line in iter(pipe.readline, b""):
+            output.put((name, line))
+    finally:
+        pipe.close()
+        output.put((name, None))
+
+
+def _stream(process, command, callback, capture, timeout):
+    """Read the output of the received process line by line, as it
+    becomes available.
+
+    :param process:   the subprocess.Popen instance
+    :param command:   the command executed by the process
+    :param callback:  a callable which receives the name of the stream
+                      (stdout or stderr) and the line
+    :param capture:   whether or not to keep the output in memory
+    :param timeout:   the amount of time (in seconds) after which
+                      the process is killed
+
+    :raises:          :class:`exception.ProcessTimeout`
+    """
+    output = queue.Queue()
+    result = {"stdout": [], "stderr": []}
+    deadline = time.time() + timeout if timeout else None
+    readers = []
+    for name in result:
+        reader = threading.Thread(target=_read_lines,
+                                  args=(name, getattr(process, name), output))
+        reader.daemon = True
+        reader.start()
+        readers.append(reader)
+
+    running = len(readers)
+    while running:
+        wait = deadline - time.time() if deadline else None
+        if wait is not None and wait <= 0:
+            process.kill()
+            process.wait()
+            raise exception.ProcessTimeout(command=command,
+                                           timeout=timeout)
+        try:
+            name, line = output.get(timeout=wait)
+        except queue.Empty:
+            continue
+
+        if line is None:
+            running -= 1
+            continue
+        if callback:
+            callback(name, line)
+        if capture:
+            result[name].append(line)
+
+    process.wait()
+    return b"".join(result["stdout"]), b"".join(result["stderr"])
+
+
+def _retry_interval(retry, retry_interval, backoff, jitter, max_interval):
+    """Return the amount of time to wait before the next attempt.
+
+    The interval grows exponentially with the number of retries and
+    a random jitter (fraction of the interval) is added in order to
+    avoid multiple clients retrying at the same time.
+    """
+    interval = min(retry_interval * (backoff ** retry), max_interval)
+    return interval + random.uniform(0, jitter * interval)
+
+
 def execute(command, **kwargs):
     """Helper method to shell out and execute a command through subprocess.
 
     :param attempts:        How many times to retry running the command.
+    :param backoff:         The multiplier applied to the retry interval
+                            after each failed attempt.
     :param binary:          On Python 3, return stdout and stderr as bytes if
                             binary is True, as Unicode otherwise.
+    :param callback:        Callable which receives the name of the stream
+                            (stdout or stderr) and each line of the output
+                            as soon as it is available. If it is provided
+                            the output is streamed instead of buffered.
+    :param capture:         Whether or not to return the output of the
+                            command when it is streamed. Defaults to True.
     :param check_exit_code: Single bool, int, or list of allowed exit
                             codes.  Defaults to [0].  Raise
                             :class:`CalledProcessError` unless
@@ -240,22 +335,42 @@ def execute(command, **kwargs):
     :param cwd:             Set the current working directory
     :param env_variables:   Environment variables and their values that
                             will be set for the process.
+    :param jitter:          The maximum random fraction of the retry
+                            interval added to it.
+    :param max_retry_interval: The upper limit of the retry interval.
     :param retry_interval:  Interval between execute attempts, in seconds
+    :param return_exit_code: Whether or not to return the exit code of
+                            the command as the third value, after
+                            stdout and stderr. Defaults to False.
     :param shell:           whether or not there should be a shell used to
                             execute this command.
+    :param stream:          Stream the output of the command to the
+                            debug log (if no callback is provided).
+    :param timeout:         The amount of time (in seconds) after which
+                            the command is killed. It requires streaming.
 
-    :raises:                :class:`subprocess.CalledProcessError`
+    :raises:                :class:`subprocess.CalledProcessError`,
+                            :class:`exception.ProcessTimeout`
     """
-    # pylint: disable=too-many-locals
+    # pylint: disable=too-many-locals, too-many-branches
 
-    attempts = kwargs.pop("attempts", global_config.misc["attempts"])
+    misc = global_config.snapshot.misc
+    attempts = kwargs.pop("attempts", misc.attempts)
+    backoff = kwargs.pop("backoff", misc.backoff)
     binary = kwargs.pop('binary', False)
+    callback = kwargs.pop("callback", None)
+    capture = kwargs.pop("capture", True)
     check_exit_code = kwargs.pop('check_exit_code', [0])
     cwd = kwargs.pop('cwd', None)
     env_variables = kwargs.pop("env_variables", None)
-    retry_interval = kwargs.pop("retry_interval",
-                                global_config.misc["retry_interval"])
+    jitter = kwargs.pop("jitter", misc.jitter)
+    max_retry_interval = kwargs.pop("max_retry_interval",
+                                    misc.max_retry_interval)
+    retry_interval = kwargs.pop("retry_interval", misc.retry_interval)
+    return_exit_code = kwargs.pop("return_exit_code", False)
     shell = kwargs.pop("shell", False)
+    stream = kwargs.pop("stream", False)
+    timeout = kwargs.pop("timeout", None)
 
     command = [str(argument) for argument in command]
     ignore_exit_code = False
@@ -266,7 +381,26 @@ def execute(command, **kwargs):
     elif isinstance(check_exit_code, int):
         check_exit_code = [check_exit_code]
 
+    def _log_line(name, line):
+        """Send the output of the command to the debug log."""
+        _LOG.debug("%(command)s [%(stream)s]: %(line)s",
+                   {"command": command[0], "stream": name,
+                    "line": line.rstrip()})
+
+    if stream:
+        callback = callback or _log_line
+
+    def line_callback(name, line):
+        """Send the decoded line to the received callback."""
+        if not callback:
+            return
+        if six.PY3 and not binary:
+            # pylint: disable=no-member
+            line = os.fsdecode(line)
+        callback(name, line)
+
     _LOG.debug("Trying to execute: %r", command)
+    retry = 0
     while attempts > 0:
         attempts = attempts - 1
         try:
@@ -275,7 +409,12 @@ def execute(command, **kwargs):
                                        stdout=subprocess.PIPE,
                                        stderr=subprocess.PIPE, shell=shell,
                                        cwd=cwd, env=env_variables)
-            result = process.communicate()
+            if callback or timeout:
+                process.stdin.close()
+                result = _stream(process, command, line_callback, capture,
+                                 timeout)
+            else:
+                result = process.communicate()
             return_code = process.returncode
 
             if six.PY3 and not binary and result is not None:
@@ -293,12 +432,17 @@ def execute(command, **kwargs):
                 raise subprocess.CalledProcessError(returncode=return_code,
                                                     cmd=command,
                                                     output=(stdout, stderr))
+            elif return_exit_code:
+                return (stdout, stderr, return_code)
             else:
                 return (stdout, stderr)
-        except subprocess.CalledProcessError as exc:
+        except (subprocess.CalledProcessError,
+                exception.ProcessTimeout) as exc:
             if attempts:
                 _LOG.debug("Failed to execute command: %r", exc)
-                time.sleep(retry_interval)
+                time.sleep(_retry_interval(retry, retry_interval, backoff,
+                                           jitter, max_retry_interval))
+                retry += 1
             else:
                 raise
 
@@ -432,6 +576,7 @@ def upgrade_bcbio_vm():
 
     execute([conda_bin, "install", "--yes",
              "-c", global_config.conda["channel"],
-             global_config.conda["package"]], check_exit_code=0)
+             global_config.conda["package"]], check_exit_code=0,
+            stream=True, capture=False)
 
     return True
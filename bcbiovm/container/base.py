@@ -19,9 +19,8 @@ class Container(object):
     def _export_environment(cls):
         """Pass external proxy information inside container for retrieval."""
         output = []
-        environment = bcbiovm_config.env
-        for field in environment.fields():
-            output.extend(["-e", "%s=%s" % (field, environment.get(field))])
+        for field, value in bcbiovm_config.env.items():
+            output.extend(["-e", "%s=%s" % (field, value)])
 
         return output
 
@@ -1,19 +1,93 @@
 """Utilities to help with developing using bcbio inside of docker."""
+import copy
 import glob
 import os
 import pwd
+import threading
 
 import numpy
-import yaml
 
 from bcbiovm import log as logging
 from bcbiovm.common import exception
+from bcbiovm.common import serialization
 from bcbiovm.common import utils as common_utils
 from bcbiovm.container.docker import mounts as docker_mounts
 
 LOG = logging.get_logger(__name__)
 
 
+class _SystemConfigCache(object):
+
+    """Process-wide cache for the parsed system configurations and
+    the genome directories referenced by the galaxy configurations.
+
+    The items are keyed by the path and the mtime of the file they
+    were read from, so a file is parsed again only after it changes.
+    """
+
+    def __init__(self):
+        self._configs = {}
+        self._genome_mounts = {}
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _mtime(path):
+        """Return the mtime of the received file or None if the file
+        does not exist.
+        """
+        try:
+            return os.path.getmtime(path)
+        except OSError:
+            return None
+
+    def system_config(self, config_file):
+        """Return a copy of the system configuration from the received
+        file.
+        """
+        key = (config_file, self._mtime(config_file))
+        with self._lock:
+            if key not in self._configs:
+                self.invalidate(config_file)
+                self._configs[key] = serialization.read(config_file)
+            # Note: The callers are allowed to update the configuration.
+            return copy.deepcopy(self._configs[key])
+
+    def genome_mounts(self, sam_loc, loader):
+        """Return a copy of the mountpoints for the genome directories
+        from the received `sam_fa_indices.loc` file.
+
+        :param loader:  function which builds the mountpoints from
+                        the file
+        """
+        key = (sam_loc, self._mtime(sam_loc))
+        with self._lock:
+            if key not in self._genome_mounts:
+                self.invalidate(sam_loc)
+                self._genome_mounts[key] = loader(sam_loc)
+            return list(self._genome_mounts[key])
+
+    def invalidate(self, path=None):
+        """Drop the cached items read from the received file.
+
+        If no path is provided all the items are dropped.
+        """
+        with self._lock:
+            for cache in (self._configs, self._genome_mounts):
+                for key in [key for key in cache
+                            if path is None or key[0] == path]:
+                    del cache[key]
+
+
+_CACHE = _SystemConfigCache()
+
+
+def invalidate_cache(path=None):
+    """Drop the cached system configurations and genome directories
+    read from the received file (or all of them).
+    """
+    _CACHE.invalidate(path)
+
+
 def _get_system_config(config, datadir):
     """Retrieve a system configuration with galaxy references
     specified.
@@ -27,8 +101,7 @@ def _get_system_config(config, datadir):
               "specified.")
 
     config_file = system_config_file(config, datadir)
-    with open(config_file) as in_handle:
-        config = yaml.load(in_handle)
+    config = _CACHE.system_config(config_file)
 
     if "galaxy_config" not in config:
         config["galaxy_config"] = os.path.join(os.path.dirname(config_file),
@@ -65,11 +138,10 @@ def get_mounts(cmd_args, datadir, dockerconf):
     mounts = ["{home}:{home}".format(home=pwd.getpwuid(os.getuid()).pw_dir)]
     mounts.extend(prepare_system(datadir, dockerconf["biodata_dir"]))
     if "sample_config" in cmd_args:
-        with open(cmd_args["sample_config"]) as in_handle:
-            sample_config = yaml.load(in_handle)
-            _, sample_mounts = docker_mounts.update_config(sample_config,
-                                                           cmd_args["fcdir"])
-            mounts.extend(sample_mounts)
+        sample_config = serialization.read(cmd_args["sample_config"])
+        _, sample_mounts = docker_mounts.update_config(sample_config,
+                                                       cmd_args["fcdir"])
+        mounts.extend(sample_mounts)
 
     if "orig_systemconfig" in cmd_args:
         orig_sconfig = system_config_file(cmd_args["orig_systemconfig"],
@@ -129,12 +201,11 @@ def prepare_system(data_directory, biodata_directory):
     return mounts
 
 
-def find_genome_directory(dirname):
-    """Handle external non-docker installed biodata located relative to
-    config directory.
+def _genome_mounts(sam_loc):
+    """Return the mountpoints for the genome directories from the
+    received `sam_fa_indices.loc` file.
     """
     mounts = []
-    sam_loc = os.path.join(dirname, "tool-data", "sam_fa_indices.loc")
     genome_dirs = {}
     if os.path.exists(sam_loc):
         with open(sam_loc) as in_handle:
@@ -153,6 +224,14 @@ def find_genome_directory(dirname):
     return mounts
 
 
+def find_genome_directory(dirname):
+    """Handle external non-docker installed biodata located relative to
+    config directory.
+    """
+    sam_loc = os.path.join(dirname, "tool-data", "sam_fa_indices.loc")
+    return _CACHE.genome_mounts(sam_loc, _genome_mounts)
+
+
 def system_config_file(config, datadir):
     """Retrieve system configuration file from input or default directory.
 
@@ -205,8 +284,6 @@ def local_system_config(config, datadir, work_dir):
     system_config = _get_system_config(config, datadir)
     system_cfile = os.path.join(work_dir, "bcbio_system-prep.yaml")
 
-    with open(system_cfile, "w") as out_handle:
-        yaml.dump(system_config, out_handle, default_flow_style=False,
-                  allow_unicode=False)
+    serialization.write(system_config, system_cfile)
 
     return system_cfile
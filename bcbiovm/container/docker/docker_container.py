@@ -7,7 +7,6 @@ import pwd
 import subprocess
 import uuid
 
-import yaml
 from bcbio import utils as bcbio_utils
 from bcbio.pipeline import genome as bcbio_genome
 from bcbio.provenance import do as bcbio_do
@@ -19,6 +18,7 @@ from bcbiovm.common import constant
 from bcbiovm.common import cluster as clusterops
 from bcbiovm.common import exception
 from bcbiovm.common import objects
+from bcbiovm.common import serialization
 from bcbiovm.common import utils as common_utils
 from bcbiovm.container import base
 from bcbiovm.container.docker import common as docker_common
@@ -28,6 +28,8 @@ from bcbiovm.provider import factory as provider_factory
 from bcbiovm.provider.common import playbook as common_playbook
 
 LOG = logging.get_logger(__name__)
+# Note: bcbio-nextgen reads the runfn arguments only as JSON or YAML.
+RUNFN_FORMATS = (serialization.JSON, serialization.YAML)
 
 
 class Docker(base.Container):
@@ -243,8 +245,7 @@ class Docker(base.Container):
         memory_list = []
 
         system_file = os.path.join(datadir, "galaxy", "bcbio_system.yaml")
-        with open(system_file) as in_handle:
-            config = yaml.safe_load(in_handle)
+        config = serialization.read(system_file)
 
         output = copy.deepcopy(config)
         for attributes in config.get("resources", {}).itervalues():
@@ -264,9 +265,8 @@ class Docker(base.Container):
                     output["resources"][prog][key] = value
 
         common_utils.backup(system_file, delete=True)
-        with open(system_file, "w") as output_handle:
-            yaml.safe_dump(output, output_handle, default_flow_style=False,
-                           allow_unicode=False)
+        serialization.write(output, system_file)
+        docker_common.invalidate_cache(system_file)
 
     @classmethod
     def run_command(cls, image, mounts, arguments, ports=None):
@@ -358,19 +358,14 @@ class Docker(base.Container):
         bcbio_system = os.path.join(work_dir, "bcbio_system-forvm.yaml")
 
         # Get system and sample configurations and mountpoints.
-        with open(sample) as in_handle:
-            sample_config, sample_mounts = docker_mounts.update_config(
-                yaml.load(in_handle), fcdir)
+        sample_config, sample_mounts = docker_mounts.update_config(
+            serialization.read(sample), fcdir)
         system_config, system_mounts = docker_common.read_system_config(
             config, datadir)
 
         # Dump the configurations on the new locations
-        with open(bcbio_sample, "w") as out_handle:
-            yaml.dump(sample_config, out_handle, default_flow_style=False,
-                      allow_unicode=False)
-        with open(bcbio_system, "w") as out_handle:
-            yaml.dump(system_config, out_handle, default_flow_style=False,
-                      allow_unicode=False)
+        serialization.write(sample_config, bcbio_sample)
+        serialization.write(system_config, bcbio_system)
 
         # Prepare the mountpoints list
         mounts = docker_common.prepare_system(datadir,
@@ -396,15 +391,14 @@ class Docker(base.Container):
         :param image:       The name of the image which should be used.
         :param config:      Global YAML configuration file specifying system
                             details.
-        :param parallel:    JSON/YAML file describing the parallel environment.
+        :param parallel:    JSON, msgpack or YAML file describing the parallel
+                            environment.
         :param function:    The name of the function.
-        :param args:        JSON/YAML file with arguments to the function.
+        :param args:        JSON, msgpack or YAML file with arguments to the
+                            function.
         """
-        with open(parallel) as in_handle:
-            parallel = yaml.safe_load(in_handle)
-
-        with open(args) as in_handle:
-            runargs = yaml.safe_load(in_handle)
+        parallel = serialization.read(parallel)
+        runargs = serialization.read(args)
 
         provider = parallel["pack"]["type"]
         ship = provider_factory.get_ship(provider)
@@ -420,9 +414,7 @@ class Docker(base.Container):
                                    dockerconf=self._config)
 
         out_file = "%s-out%s" % os.path.splitext(args)
-        with open(out_file, "w") as out_handle:
-            yaml.safe_dump(result, out_handle, default_flow_style=False,
-                           allow_unicode=False)
+        serialization.write(result, out_file)
         ship.pack.send_output(shipping_config(parallel["pack"]), out_file)
 
     def run_function(self, function, arguments, cmd_args, parallel,
@@ -437,8 +429,16 @@ class Docker(base.Container):
         :param dockerconf:  A dinctionary with configurations for docker.
         :param ports:       A list of ports that will be published from
                             container to the host.
+
+        :raises: bcbiovm.exception.NotSupported if the format from
+                 the `docker.runfn_format` option is not supported
         """
         LOG.debug("Run %r inside a docker container.", function)
+        runfn_format = bcbio_config["docker.runfn_format"]
+        if runfn_format not in RUNFN_FORMATS:
+            raise exception.NotSupported(
+                feature="The %r format for the runfn files" % runfn_format,
+                context="bcbio-nextgen runfn inside the container")
 
         docker_conf = docker_conf or self._config
         ship_conf = objects.ShippingConfig(cmd_args["pack"])
@@ -456,12 +456,11 @@ class Docker(base.Container):
         mounts.append("%s:%s" % (work_dir, docker_conf["work_dir"]))
         mounts.extend(system_mounts)
 
-        argfile = os.path.join(work_dir, "runfn-%s-%s.yaml" %
-                               (function, uuid.uuid4()))
-        with open(argfile, "w") as out_handle:
-            yaml.safe_dump(docker_remap.external_to_docker(arguments, mounts),
-                           out_handle, default_flow_style=False,
-                           allow_unicode=False)
+        argfile = os.path.join(work_dir, "runfn-%s-%s%s" % (
+            function, uuid.uuid4(),
+            serialization.get_extension(runfn_format)))
+        serialization.write(
+            docker_remap.external_to_docker(arguments, mounts), argfile)
 
         outfile = "%s-out%s" % os.path.splitext(argfile)
         docker_argfile = os.path.join(docker_conf["work_dir"],
@@ -474,9 +473,8 @@ class Docker(base.Container):
             raise exception.BCBioException("Subprocess in docker container"
                                            " failed.")
 
-        with open(outfile) as in_handle:
-            out = docker_remap.docker_to_external(yaml.safe_load(in_handle),
-                                                  mounts)
+        out = docker_remap.docker_to_external(serialization.read(outfile),
+                                              mounts)
         out = finalizer(out)
         for each_file in (argfile, outfile):
             if os.path.exists(each_file):
@@ -507,4 +505,5 @@ class Docker(base.Container):
             raise exception.BCBioException("Unspecified image name for "
                                            "docker import")
 
-        common_utils.execute(["docker", "pull", image], check_exit_code=0)
+        common_utils.execute(["docker", "pull", image], check_exit_code=0,
+                             stream=True, capture=False)
@@ -1 +0,0 @@
-from bcbiovm.provider.aws.aws_provider import AWSProvider
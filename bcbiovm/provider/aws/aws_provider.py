@@ -79,7 +79,7 @@ class AWSProvider(base.BaseCloudProvider):
         """
         return self._STORAGE.get(name)()
 
-    def information(self, config, cluster):
+    def information(self, config, cluster, writer=None):
         """
         Get all the information available for this provider.
 
@@ -88,14 +88,12 @@ class AWSProvider(base.BaseCloudProvider):
 
         :config:          elasticluster config file
         :cluster:         cluster name
+        :writer:          an instance of :class:`objects.StreamWriter`
+                          which receives the information as soon as it
+                          is fetched
         """
-        report = aws_resources.Report(config, cluster)
-        report.add_cluster_info()
-        report.add_iam_info()
-        report.add_security_groups_info()
-        report.add_vpc_info()
-        report.add_instance_info()
-        return report.digest()
+        report = aws_resources.Report(config, cluster, writer=writer)
+        return report.collect()
 
     def colect_data(self, config, cluster, rawdir):
         """Collect from the each instances the files which contains
@@ -120,7 +118,7 @@ class AWSProvider(base.BaseCloudProvider):
                                             playbook=self._playbook)
         return collector.run()
 
-    def resource_usage(self, bcbio_log, rawdir):
+    def resource_usage(self, bcbio_log, rawdir, resample=None):
         """Generate system statistics from bcbio runs.
 
         Parse the files obtained by the :meth colect_data: and put the
@@ -128,6 +126,8 @@ class AWSProvider(base.BaseCloudProvider):
 
         :param bcbio_log:   local path to bcbio log file written by the run
         :param rawdir:      directory to put raw data files
+        :param resample:    the length of the buckets used for
+                            downsampling the data (Ex: "10s", "60s")
 
         :return: a tuple with two dictionaries, the first contains
                  an instance of :pandas.DataFrame: for each host and
@@ -135,20 +135,38 @@ class AWSProvider(base.BaseCloudProvider):
                  hardware configuration
         :type return: tuple
         """
-        parser = aws_resources.Parser(bcbio_log, rawdir)
+        parser = aws_resources.Parser(bcbio_log, rawdir, resample)
         return parser.run()
 
-    def bootstrap(self, config, cluster, reboot):
+    def resource_summary(self, bcbio_log, rawdir, resample=None):
+        """Summarize the resource usage of the whole cluster for each
+        bcbio step.
+
+        :param bcbio_log:   local path to bcbio log file written by the run
+        :param rawdir:      directory to put raw data files
+        :param resample:    the length of the buckets used for
+                            downsampling the data (Ex: "10s", "60s")
+
+        :return:    an instance of :class bcbio.common.objects.Report:
+        """
+        parser = aws_resources.Parser(bcbio_log, rawdir, resample)
+        data, hardware, _ = parser.run()
+        summary = aws_resources.Summary(bcbio_log, data, hardware)
+        return summary.run()
+
+    def bootstrap(self, config, cluster, reboot, force=False):
         """Install or update the bcbio-nextgen code and the tools
         with the latest version available.
 
         :param config:    elasticluster config file
         :param cluster:   cluster name
         :param reboot:    whether to upgrade and restart the host OS
+        :param force:     run the playbooks even if nothing changed
+                          since their last run
         """
         bootstrap = common_bootstrap.Bootstrap(provider=self, config=config,
                                                cluster_name=cluster,
-                                               reboot=reboot)
+                                               reboot=reboot, force=force)
         return bootstrap.run()
 
     def upload_biodata(self, genome, target, source, context):
@@ -3,11 +3,11 @@ import os
 import shutil
 import uuid
 
-import yaml
-
 from bcbio import utils
 from bcbio.provenance import do
 
+from bcbiovm import config as bcbio_config
+from bcbiovm.common import serialization
 from bcbiovm.common import utils as common_utils
 from bcbiovm.provider import factory as provider_factory
 
@@ -68,21 +68,16 @@ def runfn(fn_name, queue, wrap_args, parallel, run_args, testing=True):
     config = shipping_config(parallel["pack"])
 
     script_file = "bcbio-%s-%s-run.sh" % (fn_name, run_id)
-    arg_file = "bcbio-%s-%s-args.json" % (fn_name, run_id)
-    parallel_file = "bcbio-%s-%s-parallel.json" % (fn_name, run_id)
+    extension = serialization.get_extension(bcbio_config["runfn.format"])
+    arg_file = "bcbio-%s-%s-args%s" % (fn_name, run_id, extension)
+    parallel_file = "bcbio-%s-%s-parallel%s" % (fn_name, run_id, extension)
     tarball = "bcbio-%s-%s.tar.gz" % (fn_name, run_id)
     out_file = "%s-out%s" % os.path.splitext(arg_file)
 
     run_args = aws_ship.pack.send_run(run_args, config)
     with utils.chdir(os.getcwd()):
-        with open(arg_file, "w") as out_handle:
-            yaml.safe_dump(run_args, out_handle,
-                           default_flow_style=False,
-                           allow_unicode=False)
-        with open(parallel_file, "w") as out_handle:
-            yaml.safe_dump(parallel, out_handle,
-                           default_flow_style=False,
-                           allow_unicode=False)
+        serialization.write(run_args, arg_file)
+        serialization.write(parallel, parallel_file)
         with open(script_file, "w") as out_handle:
             for line in _bootstrap_sh(fn_name, os.path.basename(arg_file),
                                       os.path.basename(parallel_file)):
@@ -106,8 +101,7 @@ def runfn(fn_name, queue, wrap_args, parallel, run_args, testing=True):
             do.run(command, "Submit to clusterk")
 
         output_file = aws_ship.reconstitute.get_output(out_file, config)
-        with open(output_file) as in_handle:
-            out = yaml.safe_load(in_handle)
+        out = serialization.read(output_file)
         for f in [script_file, parallel_file, arg_file, tarball, out_file]:
             if os.path.exists(f):
                 os.remove(f)
@@ -2,9 +2,9 @@
 """
 import os
 
-import yaml
 from bcbio.pipeline import main
 
+from bcbiovm.common import serialization
 from bcbiovm.container.docker import docker_container
 from bcbiovm.container.docker import mounts as docker_mounts
 from bcbiovm.provider import factory as provider_factory
@@ -21,18 +21,14 @@ def run(args, docker_config):
         "wrapper": "runfn"
     }
 
-    with open(args.sample_config) as in_handle:
-        ready_config, _ = docker_mounts.normalize_config(yaml.load(in_handle),
-                                                         args.fcdir)
+    ready_config, _ = docker_mounts.normalize_config(
+        serialization.read(args.sample_config), args.fcdir)
 
     ready_config_file = os.path.splitext(os.path.basename(args.sample_config))
     ready_config_file = os.path.join(work_dir,
                                      "%s-ready%s" % ready_config_file)
 
-    with open(ready_config_file, "w") as out_handle:
-        yaml.safe_dump(ready_config, out_handle,
-                       default_flow_style=False,
-                       allow_unicode=False)
+    serialization.write(ready_config, ready_config_file)
 
     ship_conf = provider_factory.get_ship_config("S3")
     parallel["pack"] = ship_conf(args.biodata_bucket, args.run_bucket,
@@ -0,0 +1,115 @@
+"""Shared connections to the AWS services.
+
+The connections are cached per service, region and credentials, so the
+modules from the AWS provider do not repeat the handshakes and the
+credential lookups for every request.
+
+The boto connections are not thread-safe, so every thread gets its
+own set of connections.
+"""
+import threading
+
+import boto
+import boto.cloudformation
+import boto.ec2
+import boto.iam
+import boto.s3
+import boto.vpc
+
+from bcbiovm import log as logging
+
+LOG = logging.get_logger(__name__)
+
+# Note: The connections used when the region is not provided.
+_DEFAULT = {
+    "cloudformation": boto.connect_cloudformation,
+    "ec2": boto.connect_ec2,
+    "iam": boto.connect_iam,
+    "s3": boto.connect_s3,
+    "vpc": boto.connect_vpc,
+}
+_REGIONAL = {
+    "cloudformation": boto.cloudformation.connect_to_region,
+    "ec2": boto.ec2.connect_to_region,
+    "iam": boto.iam.connect_to_region,
+    "s3": boto.s3.connect_to_region,
+    "vpc": boto.vpc.connect_to_region,
+}
+
+# Note: The connections of each thread are dropped with the thread.
+_LOCAL = threading.local()
+# Note: Incremented by clear() in order to drop the connections cached
+#       by all the threads.
+_STATE = {"generation": 0}
+_LOCK = threading.Lock()
+
+
+def _connections():
+    """Return the connections cached for the current thread."""
+    cache = getattr(_LOCAL, "connections", None)
+    if cache is None or _LOCAL.generation != _STATE["generation"]:
+        _LOCAL.connections = cache = {}
+        _LOCAL.generation = _STATE["generation"]
+    return cache
+
+
+def get(service, region=None, access_key=None, secret_key=None):
+    """Return a connection to the received AWS service.
+
+    The connection is shared only with the callers from the current
+    thread.
+
+    :param service:     the name of the service (cloudformation, ec2,
+                        iam, s3 or vpc)
+    :param region:      the name of the region
+    :param access_key:  the AWS access key ID
+    :param secret_key:  the AWS secret access key
+
+    :raises:            KeyError if the service is not supported
+    """
+    connections = _connections()
+    key = (service, region, access_key, secret_key)
+    connection = connections.get(key)
+    if connection is not None:
+        return connection
+
+    LOG.debug("Creating a new connection to %(service)s (region: "
+              "%(region)s, thread: %(thread)s).",
+              {"service": service, "region": region,
+               "thread": threading.current_thread().name})
+    credentials = {}
+    if access_key and secret_key:
+        credentials = {"aws_access_key_id": access_key,
+                       "aws_secret_access_key": secret_key}
+    if region:
+        connection = _REGIONAL[service](region, **credentials)
+    else:
+        connection = _DEFAULT[service](**credentials)
+
+    connections[key] = connection
+    return connection
+
+
+def from_config(service, cloud_config, regional=True):
+    """Return a connection to the received AWS service using the
+    information from the `cloud` section of the Elasticluster config.
+
+    :param service:       the name of the service
+    :param cloud_config:  the `cloud` section of the Elasticluster config
+    :param regional:      whether to connect to the region from
+                          the config or to the default one
+    """
+    region = cloud_config.get("ec2_region") if regional else None
+    return get(service, region=region,
+               access_key=cloud_config.get("ec2_access_key"),
+               secret_key=cloud_config.get("ec2_secret_key"))
+
+
+def clear():
+    """Drop all the cached connections, from all the threads.
+
+    The connections of each thread are dropped the next time the
+    thread requests a connection.
+    """
+    with _LOCK:
+        _STATE["generation"] += 1
@@ -10,6 +10,7 @@ import toolz
 
 from bcbiovm import log as logging
 from bcbiovm.common import utils
+from bcbiovm.provider.aws import connection as aws_connection
 
 LOG = logging.get_logger(__name__)
 IAM_POLICY = """{
@@ -41,7 +42,7 @@ class IAMOps(object):
     """Create IAM users and instance profiles for running bcbio on AWS."""
 
     def __init__(self):
-        self._connection = boto.connect_iam()
+        self._connection = aws_connection.get("iam")
 
     def _create_user(self, create, recreate, credentials, **kwargs):
         """Create or recreate an IAM user."""
@@ -88,7 +89,7 @@ class IAMOps(object):
                  "-f", private_key, "-C", "bcbio_aws_keypair"],
                 check_exit_code=0)
 
-        ec2 = boto.connect_ec2()
+        ec2 = aws_connection.get("ec2")
         key = ec2.get_key_pair(keyname)
         if key and new_key:
             ec2.delete_key_pair(keyname)
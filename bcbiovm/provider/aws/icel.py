@@ -3,12 +3,14 @@
 More information regarding ICEL can be found on the following link:
 https://goo.gl/jxEj0e
 """
+import collections
+import datetime
+import hashlib
 import os
 import re
+import threading
 import time
 
-import boto.cloudformation
-import boto.ec2
 import boto.s3
 import json
 import struct
@@ -17,11 +19,13 @@ import requests
 import toolz
 from elasticluster import exceptions as ec_exc
 
+from bcbiovm import config as bcbio_config
 from bcbiovm import log as logging
 from bcbiovm.common import cluster as cluster_ops
 from bcbiovm.common import constant
 from bcbiovm.common import exception
 from bcbiovm.common import utils
+from bcbiovm.provider.aws import connection as aws_connection
 
 LOG = logging.get_logger(__name__)
 
@@ -51,6 +55,344 @@ TEMPLATES = {
 }
 
 
+class InstanceIndex(object):
+
+    """Index over the EC2 instances and network interfaces from
+    a region, built with server-side filtered queries.
+
+    The index is meant to be built once per operation and it does not
+    require an API call for each network interface.
+    """
+
+    _STACK_TAG = "tag:aws:cloudformation:stack-name"
+    _ACTIVE_STATES = ["pending", "running", "stopping", "stopped"]
+
+    def __init__(self, connection, filters=None, instance_ids=None):
+        """
+        :param connection:    an instance of :class boto.ec2.EC2Connection:
+        :param filters:       the filters used for querying the instances
+        :param instance_ids:  a list of instance IDs
+        """
+        self._connection = connection
+        self._instances = collections.OrderedDict()
+        self._interfaces = collections.defaultdict(list)
+        self._addresses = {}
+
+        for instance in self._get_instances(filters, instance_ids):
+            self._instances[instance.id] = instance
+            if instance.private_ip_address:
+                self._addresses[instance.private_ip_address] = instance
+
+        if self._instances:
+            interfaces = connection.get_all_network_interfaces(
+                filters={"attachment.instance-id": list(self._instances)})
+            for interface in interfaces:
+                instance = self._instances.get(
+                    interface.attachment.instance_id)
+                if instance is None:
+                    continue
+                self._interfaces[instance.id].append(interface)
+                for address in self._interface_addresses(interface):
+                    self._addresses.setdefault(address, instance)
+
+    @classmethod
+    def for_stack(cls, connection, stack_name, filters=None):
+        """Build the index for the active instances from the received
+        CloudFormation stack.
+        """
+        stack_filters = {cls._STACK_TAG: stack_name,
+                         "instance-state-name": cls._ACTIVE_STATES}
+        stack_filters.update(filters or {})
+        return cls(connection, filters=stack_filters)
+
+    @classmethod
+    def for_address(cls, connection, address):
+        """Build the index for the instance which owns the received
+        private IP address.
+        """
+        index = cls(connection, filters={"private-ip-address": address})
+        if index.instances():
+            return index
+
+        # The address belongs to a secondary network interface.
+        interfaces = connection.get_all_network_interfaces(
+            filters={"addresses.private-ip-address": address})
+        instance_ids = [interface.attachment.instance_id
+                        for interface in interfaces if interface.attachment]
+        if not instance_ids:
+            return index
+        return cls(connection, instance_ids=instance_ids)
+
+    @staticmethod
+    def _interface_addresses(interface):
+        """Return all the private IP addresses of the interface."""
+        addresses = [interface.private_ip_address]
+        addresses.extend(address.private_ip_address for address in
+                         getattr(interface, "private_ip_addresses", []))
+        return [address for address in addresses if address]
+
+    def _get_instances(self, filters, instance_ids):
+        """Return the instances which match the received filters,
+        following the pagination of the results.
+        """
+        next_token = None
+        while True:
+            reservations = self._connection.get_all_reservations(
+                instance_ids=instance_ids, filters=filters,
+                next_token=next_token)
+            for reservation in reservations:
+                for instance in reservation.instances:
+                    yield instance
+            next_token = getattr(reservations, "next_token", None)
+            if not next_token:
+                break
+
+    def instances(self):
+        """Return the indexed instances."""
+        return list(self._instances.values())
+
+    def interfaces(self, instance):
+        """Return the network interfaces of the received instance."""
+        return self._interfaces.get(instance.id, [])
+
+    def find(self, address):
+        """Return the instance which owns the received private IP
+        address or None.
+        """
+        return self._addresses.get(address)
+
+
+class StackWaiter(object):
+
+    """Wait for one or more CloudFormation stacks to reach the desired
+    state, reporting the progress of each resource.
+
+    The stack events are read incrementally and the polling interval
+    grows while the stacks do not report new events.
+    """
+
+    _FAILED = "_FAILED"
+    _IN_PROGRESS = "_IN_PROGRESS"
+    # Note: Tolerate small differences between the local clock and
+    #       the timestamps of the events.
+    _CLOCK_SKEW = datetime.timedelta(minutes=1)
+
+    def __init__(self, connection, min_interval=2, max_interval=30,
+                 backoff=1.5):
+        """
+        :param connection:    a CloudFormation connection
+        :param min_interval:  the initial interval between two polls
+        :param max_interval:  the maximum interval between two polls
+        :param backoff:       the multiplier applied to the interval when
+                              no new events are available
+        """
+        self._connection = connection
+        self._min_interval = min_interval
+        self._max_interval = max_interval
+        self._backoff = backoff
+
+    def _new_events(self, stack_id, last_event):
+        """Return the events which occurred after the last seen event,
+        in chronological order.
+        """
+        events, next_token = [], None
+        while True:
+            page = self._connection.describe_stack_events(
+                stack_id, next_token=next_token)
+            for event in page:
+                # The events are sorted in reverse chronological order.
+                if event.event_id == last_event:
+                    return list(reversed(events))
+                events.append(event)
+            next_token = getattr(page, "next_token", None)
+            if not next_token:
+                return list(reversed(events))
+
+    def _poll(self, stack, since):
+        """Read the new events and the status of the received stack.
+
+        :return: whether there were new events
+        """
+        events = self._new_events(stack["id"], stack["last_event"])
+        for event in events:
+            stack["last_event"] = event.event_id
+            if event.timestamp and event.timestamp < since:
+                continue
+            LOG.info("%(stack)s: %(resource)s (%(type)s) %(status)s "
+                     "%(reason)s", {"stack": stack["name"],
+                                    "resource": event.logical_resource_id,
+                                    "type": event.resource_type,
+                                    "status": event.resource_status,
+                                    "reason": event.resource_status_reason or
+                                    ""})
+            if event.resource_status.endswith(self._FAILED):
+                stack["failures"].append(
+                    "%(id)s: %(status)s" %
+                    {"id": event.logical_resource_id,
+                     "status": event.resource_status_reason})
+
+        stack["status"] = self._connection.describe_stacks(
+            stack["id"])[0].stack_status
+        return bool(events)
+
+    def wait(self, stack_name, desired_state, timeout):
+        """Wait until the stack reaches the desired state.
+
+        :raises: exception.BCBioException if the stack failed
+        """
+        return self.wait_all({stack_name: desired_state}, timeout)
+
+    def wait_all(self, stacks, timeout):
+        """Wait until all the received stacks reach the desired state.
+
+        :param stacks:   a dictionary with the name of the stacks and
+                         their desired state
+        :param timeout:  the maximum amount of time (in seconds)
+
+        :return:         the name of the stacks which did not reach
+                         the desired state until the timeout
+        :raises:         exception.BCBioException if any of the stacks
+                         failed
+        """
+        since = datetime.datetime.utcnow() - self._CLOCK_SKEW
+        deadline = time.time() + timeout
+        pending = {}
+        for stack_name, desired_state in stacks.items():
+            stack = self._connection.describe_stacks(stack_name)[0]
+            pending[stack_name] = {
+                "id": stack.stack_id, "name": stack_name,
+                "desired_state": desired_state, "status": None,
+                "last_event": None, "failures": []}
+
+        interval = self._min_interval
+        while pending:
+            new_events = False
+            for stack_name, stack in list(pending.items()):
+                new_events = self._poll(stack, since) or new_events
+                if stack["status"] == stack["desired_state"]:
+                    LOG.info("Stack %(stack)s reached the %(status)s state.",
+                             {"stack": stack_name,
+                              "status": stack["status"]})
+                    del pending[stack_name]
+
+                elif (stack["failures"] or
+                      not stack["status"].endswith(self._IN_PROGRESS)):
+                    # Note: Do not wait for the rollback to finish.
+                    raise exception.BCBioException(
+                        "Stack %(stack)s did not reach the %(desired)s "
+                        "state: %(status)s: %(failed)s", stack=stack_name,
+                        desired=stack["desired_state"],
+                        status=stack["status"],
+                        failed=",".join(stack["failures"]))
+
+            remaining = deadline - time.time()
+            if not pending:
+                break
+            if remaining <= 0:
+                LOG.warning("Timeout while waiting for the stacks: %s",
+                            ", ".join(pending))
+                break
+
+            if new_events:
+                interval = self._min_interval
+            else:
+                interval = min(interval * self._backoff, self._max_interval)
+            time.sleep(min(interval, remaining))
+
+        return list(pending)
+
+
+class TemplateStore(object):
+
+    """Cache for the ICEL CloudFormation templates.
+
+    The source templates are kept on the local storage, keyed by region
+    and template URL, while the rendered templates are kept in memory,
+    keyed by the source template and the rendering parameters.
+    """
+
+    _lock = threading.Lock()
+    _rendered = {}
+
+    def __init__(self, cache_dir=None):
+        """
+        :param cache_dir:  the directory used for the source templates
+        """
+        self._cache_dir = cache_dir or bcbio_config["icel.template_cache"]
+
+    @staticmethod
+    def digest(content):
+        """Return the hash of the received content."""
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()[:16]
+
+    def _path(self, region, url):
+        """Return the path of the cached source template."""
+        key = "{}-{}".format(region, self.digest(url))
+        return os.path.join(self._cache_dir, "{}.template".format(key))
+
+    def source(self, region, url):
+        """Return the content of the source template, downloading it
+        only if it is not available on the local storage.
+
+        :raises: requests.exceptions.RequestException
+        """
+        path = self._path(region, url)
+        if os.path.exists(path):
+            with open(path, "r") as file_handle:
+                return file_handle.read()
+
+        LOG.debug("Downloading the ICEL template %(url)s",
+                  {"url": url})
+        response = requests.get(url)
+        response.raise_for_status()
+        content = response.text
+
+        if not os.path.exists(self._cache_dir):
+            os.makedirs(self._cache_dir)
+        utils.write_file(path, content, open_mode="w")
+        return content
+
+    def template(self, region, url):
+        """Return the source template as a dictionary.
+
+        A cached source template which is not a valid JSON document
+        (a partial download, for example) is removed and downloaded
+        again.
+
+        :raises: requests.exceptions.RequestException, ValueError if
+                 the downloaded template is not a valid JSON document
+        """
+        try:
+            return json.loads(self.source(region, url))
+        except ValueError:
+            path = self._path(region, url)
+            if not os.path.exists(path):
+                raise
+            LOG.warning("The cached ICEL template %(path)s is corrupt, "
+                        "downloading it again.", {"path": path})
+            os.remove(path)
+        return json.loads(self.source(region, url))
+
+    def rendered(self, region, url, parameters, render):
+        """Return the content of the rendered template.
+
+        :param region:      the AWS region
+        :param url:         the URL of the source template
+        :param parameters:  a tuple with the rendering parameters
+        :param render:      a callable which receives the template
+                            as a dictionary and returns the rendered one
+
+        :raises: requests.exceptions.RequestException, ValueError
+        """
+        key = (region, url, parameters)
+        with self._lock:
+            if key not in self._rendered:
+                tree = self.template(region, url)
+                self._rendered[key] = json.dumps(render(tree),
+                                                 sort_keys=True)
+            return self._rendered[key]
+
+
 class ICELOps(object):
 
     """Create an Intel ICEL stack on AWS."""
@@ -122,22 +464,12 @@ class ICELOps(object):
             if isinstance(name, (str, unicode)) and name.startswith(prefix):
                 return (index, name)
 
-    def _upload_icel_cf_template(self, oss_count, ost_vol_size, ost_vol_count,
-                                 bucket_name):
-        """Upload the ICEL CloudFormation template file."""
-        # pylint: disable=too-many-locals
-
+    def _render_icel_cf_template(self, tree, oss_count, ost_vol_size,
+                                 ost_vol_count):
+        """Adapt the ICEL CloudFormation template to the received
+        configuration.
+        """
         aws_config = self._cluster_config['cloud']
-        icel_template = TEMPLATES[aws_config['ec2_region']]
-
-        try:
-            source_template = requests.get(icel_template)
-        except requests.exceptions.RequestException:
-            LOG.exception("HTTP request failed: %(url)s",
-                          {"url": icel_template})
-            return
-
-        tree = source_template.json()
         tree['Description'] = tree['Description'].replace(
             '4 Object Storage Servers',
             '{} Object Storage Servers'.format(oss_count))
@@ -176,17 +508,43 @@ class ICELOps(object):
         resources['OSSNodes']['Properties']['MaxSize'] = oss_count
         resources['OSSNodes']['Properties']['MinSize'] = oss_count
         resources['OssWaitCondition']['Properties']['Count'] = oss_count
+        return tree
+
+    def _upload_icel_cf_template(self, oss_count, ost_vol_size, ost_vol_count,
+                                 bucket_name):
+        """Upload the ICEL CloudFormation template file.
 
-        conn = boto.s3.connect_to_region(
-            aws_config['ec2_region'],
-            aws_access_key_id=aws_config['ec2_access_key'],
-            aws_secret_access_key=aws_config['ec2_secret_key'])
+        The template is uploaded only if a template with the same
+        content is not already available in the bucket.
+        """
+        aws_config = self._cluster_config['cloud']
+        region = aws_config['ec2_region']
+        store = TemplateStore()
+
+        try:
+            content = store.rendered(
+                region, TEMPLATES[region],
+                (oss_count, ost_vol_size, ost_vol_count),
+                lambda tree: self._render_icel_cf_template(
+                    tree, oss_count, ost_vol_size, ost_vol_count))
+        except requests.exceptions.RequestException:
+            LOG.exception("HTTP request failed: %(url)s",
+                          {"url": TEMPLATES[region]})
+            return
+
+        conn = aws_connection.from_config("s3", aws_config)
         bucket = conn.create_bucket(bucket_name)
 
-        s3_key = boto.s3.key.Key(bucket)
-        s3_key.key = 'icel-cf-template.json'
-        s3_key.set_contents_from_string(json.dumps(tree))
-        s3_key.make_public()
+        key_name = 'icel-cf-template-{}.json'.format(store.digest(content))
+        s3_key = bucket.get_key(key_name)
+        if s3_key is None:
+            s3_key = boto.s3.key.Key(bucket)
+            s3_key.key = key_name
+            s3_key.set_contents_from_string(content)
+            s3_key.make_public()
+        else:
+            LOG.debug("The ICEL template %(key)s is already available.",
+                      {"key": key_name})
 
         return s3_key.generate_url(5 * 60, query_auth=False)
 
@@ -227,25 +585,21 @@ class ICELOps(object):
         the clients and other Lustre components.
         """
         aws_config = self._cluster_config["cloud"]
-        connection = boto.ec2.connect_to_region(
-            aws_config['ec2_region'],
-            aws_access_key_id=aws_config['ec2_access_key'],
-            aws_secret_access_key=aws_config['ec2_secret_key'])
+        connection = aws_connection.from_config("ec2", aws_config)
 
-        reservations = connection.get_all_reservations(
+        index = InstanceIndex(
+            connection,
             filters={'tag:Name': 'mgt*',
                      'tag:aws:cloudformation:stack-name': stack_name})
 
-        for resv in reservations:
-            for instance in resv.instances:
-                for iface in instance.interfaces:
-                    iface.update()
-                    if iface.tags.get('lustre:server_role') == 'mgt':
-                        # HA MGTs have a tagged interface.
-                        return iface.private_ip_address
+        for instance in index.instances():
+            for iface in index.interfaces(instance):
+                if iface.tags.get('lustre:server_role') == 'mgt':
+                    # HA MGTs have a tagged interface.
+                    return iface.private_ip_address
 
-                # Non-HA MGTs don't.
-                return instance.private_ip_address
+            # Non-HA MGTs don't.
+            return instance.private_ip_address
 
         return None
 
@@ -256,10 +610,8 @@ class ICELOps(object):
         #                       boto.cloudformation.
         # Instance of 'EC2Connection' has no 'describe_stacks'
         # member (no-member)
-        connection = boto.cloudformation.connect_to_region(
-            aws_config['ec2_region'],
-            aws_access_key_id=aws_config['ec2_access_key'],
-            aws_secret_access_key=aws_config['ec2_secret_key'])
+        connection = aws_connection.from_config("cloudformation",
+                                                aws_config)
 
         icel_stack = connection.describe_stacks(stack_name)[0]
         for param in icel_stack.parameters:
@@ -319,54 +671,23 @@ class ICELOps(object):
         utils.write_file(path, content, open_mode="w")
 
     def _wait_for_stack(self, stack_name, desired_state, timeout,
-                        retry_interval=10):
+                        retry_interval=2):
         """Wait until the desired state is reached."""
         aws_config = self._cluster_config['cloud']
-        conn = boto.cloudformation.connect_to_region(
-            aws_config['ec2_region'],
-            aws_access_key_id=aws_config['ec2_access_key'],
-            aws_secret_access_key=aws_config['ec2_secret_key'])
-
-        stack = conn.describe_stacks(stack_name)[0]
-        while timeout > 0:
-            wait_time = min(retry_interval, timeout)
-
-            stack.update()
-            status = stack.stack_status
-            if status == desired_state:
-                return
-            elif status.endswith('_IN_PROGRESS'):
-                pass
-            else:
-                failed_events = []
-                for event in stack.describe_events():
-                    if event.resource_status.endswith('_FAILED'):
-                        failed_events.append(
-                            "%(id)s: %(status)s" %
-                            {"id": event.logical_resource_id,
-                             "status": event.resource_status_reason})
-
-                raise exception.BCBioException(
-                    "Stack %(stack)s did not launch successfully: "
-                    "%(status)s: %(failed)s", stack=stack_name, status=status,
-                    failed=",".join(failed_events))
-
-            time.sleep(wait_time)
-            timeout -= retry_interval
+        conn = aws_connection.from_config("cloudformation", aws_config)
+        waiter = StackWaiter(conn, min_interval=retry_interval)
+        waiter.wait(stack_name, desired_state, timeout)
 
     def _delete_stack(self, stack_name):
         """Delete a Lustre CloudFormation stack."""
         cluster_config = self._cluster_config['cloud']
-        cf_conn = boto.cloudformation.connect_to_region(
-            cluster_config['ec2_region'],
-            aws_access_key_id=cluster_config['ec2_access_key'],
-            aws_secret_access_key=cluster_config['ec2_secret_key'])
+        cf_conn = aws_connection.from_config("cloudformation",
+                                             cluster_config)
         cf_conn.delete_stack(stack_name)
         LOG.info('Waiting for stack to delete (this will take a few minutes)')
         self._wait_for_stack(stack_name=stack_name,
                              desired_state=self._DELETE_COMPLETE,
-                             timeout=900,   # 15 minutes
-                             retry_interval=10)
+                             timeout=900)   # 15 minutes
 
     def _mount(self, stack_name, mount=True):
         """Mount or unmount Lustre filesystem on all cluster nodes."""
@@ -397,46 +718,31 @@ class ICELOps(object):
     def stack_name(self, node_addr):
         """Get the name of the CloudFormation stack a node belongs to."""
         aws_config = self._cluster_config["cloud"]
-        connection = boto.ec2.connect_to_region(
-            aws_config['ec2_region'],
-            aws_access_key_id=aws_config['ec2_access_key'],
-            aws_secret_access_key=aws_config['ec2_secret_key'])
-
-        reservations = connection.get_all_reservations()
-        for resv in reservations:
-            for inst in resv.instances:
-                # Non-HA MGTs don't have a tagged interface.
-                if inst.private_ip_address == node_addr:
-                    return inst.tags['aws:cloudformation:stack-name']
-
-                for iface in inst.interfaces:
-                    iface.update()
-                    if iface.private_ip_address == node_addr:
-                        return inst.tags.get('aws:cloudformation:stack-name')
+        connection = aws_connection.from_config("ec2", aws_config)
+
+        instance = InstanceIndex.for_address(connection, node_addr).find(
+            node_addr)
+        if instance is None:
+            return None
+        return instance.tags.get('aws:cloudformation:stack-name')
 
     def instances(self, stack_name):
         """Get the IP addresses of all instances in a CloudFormation stack."""
         aws_config = self._cluster_config["cloud"]
-        conn = boto.ec2.connect_to_region(
-            aws_config['ec2_region'],
-            aws_access_key_id=aws_config['ec2_access_key'],
-            aws_secret_access_key=aws_config['ec2_secret_key'])
-        reservations = conn.get_all_reservations(
-            filters={'tag:aws:cloudformation:stack-name': stack_name}
-        )
+        conn = aws_connection.from_config("ec2", aws_config)
+        index = InstanceIndex.for_stack(conn, stack_name)
 
         ip_address = {}
-        for resv in reservations:
-            for instance in resv.instances:
-                if instance.state in ['terminated', 'shutting-down']:
-                    # Instances might still be around for stopped stacks with
-                    # the same stack name, so ignore them.
-                    continue
-                name = instance.tags['Name']
-                if instance.tags['Name'] == 'NATDevice':
-                    ip_address[name] = instance.ip_address
-                else:
-                    ip_address[name] = instance.private_ip_address
+        for instance in index.instances():
+            if instance.state in ['terminated', 'shutting-down']:
+                # Instances might still be around for stopped stacks with
+                # the same stack name, so ignore them.
+                continue
+            name = instance.tags['Name']
+            if instance.tags['Name'] == 'NATDevice':
+                ip_address[name] = instance.ip_address
+            else:
+                ip_address[name] = instance.private_ip_address
         return ip_address
 
     def create_stack(self, stack_name, template_url, lustre_net, recreate):
@@ -466,13 +772,10 @@ class ICELOps(object):
                 ParameterKey=SSHFrom,ParameterValue=0.0.0.0/0
         """
         cluster_config = self._ecluster.get_config(self._cluster_name)
-        conn = boto.connect_vpc(
-            aws_access_key_id=cluster_config['cloud']['ec2_access_key'],
-            aws_secret_access_key=cluster_config['cloud']['ec2_secret_key'])
-        cf_conn = boto.cloudformation.connect_to_region(
-            cluster_config['cloud']['ec2_region'],
-            aws_access_key_id=cluster_config['cloud']['ec2_access_key'],
-            aws_secret_access_key=cluster_config['cloud']['ec2_secret_key'])
+        conn = aws_connection.from_config("vpc", cluster_config['cloud'],
+                                          regional=False)
+        cf_conn = aws_connection.from_config("cloudformation",
+                                             cluster_config['cloud'])
 
         for stack in cf_conn.list_stacks(self._CREATE_COMPLETE):
             if stack.stack_name == stack_name:
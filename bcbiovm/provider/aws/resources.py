@@ -2,23 +2,28 @@
 Helper class for collecting and processing information regarding
 resources usage.
 """
+import calendar
 import collections
+import datetime
 import os
 import re
+import sys
+import threading
 
 from bcbio.graph import graph
-import boto.ec2
-import boto.iam
-import boto.vpc
+import numpy
 import pandas
 import paramiko
+import six
 import toolz
 
+from bcbiovm import config as bcbio_config
 from bcbiovm import log as logging
 from bcbiovm.common import cluster as cluster_ops
 from bcbiovm.common import constant
 from bcbiovm.common import utils
 from bcbiovm.common import objects
+from bcbiovm.provider.aws import connection as aws_connection
 from bcbiovm.provider.aws import icel
 
 LOG = logging.get_logger(__name__)
@@ -194,14 +199,26 @@ class Parser(object):
     """Parse the files collected by :class Collector:"""
 
     COLLECTL_SUFFIX = '.raw.gz'
+    COLLECTL_FILE = re.compile(r'^(?P<host>.+)-(?P<timestamp>\d{8}-\d{6})'
+                               r'\.raw\.gz$')
+    # Note: The collectl files are named using the local time of the
+    #       host, while the bcbio timings are in UTC.
+    _WINDOW_SLACK = 14 * 3600
 
-    def __init__(self, bcbio_log, rawdir):
+    def __init__(self, bcbio_log, rawdir, resample=None, aggregations=None):
         """
-        :param bcbio_log:   the bcbio log path
-        :param rawdir:      directory to put raw data files
+        :param bcbio_log:     the bcbio log path
+        :param rawdir:        directory to put raw data files
+        :param resample:      the length of the buckets used for
+                              downsampling the data (Ex: "10s", "60s")
+        :param aggregations:  the aggregations computed for each metric
+                              from a bucket (Ex: ("min", "mean", "max"))
         """
         self._bcbio_log = bcbio_log
         self._rawdir = rawdir
+        self._resample = resample or bcbio_config["graph.resample"]
+        self._aggregations = (aggregations or
+                              bcbio_config["graph.aggregations"])
 
     def __call__(self):
         """Allows an instance of a class to be called as a function."""
@@ -218,6 +235,65 @@ class Parser(object):
         steps = bcbio_timings.keys()
         return output(min(steps), max(steps), steps)
 
+    @staticmethod
+    def timestamp(moment):
+        """Return the number of seconds since the epoch for the received
+        datetime (naive datetimes are considered to be in UTC).
+        """
+        return calendar.timegm(moment.utctimetuple())
+
+    def _in_time_frame(self, collectl_path, timestamp, time_frame):
+        """Check if the received collectl file can contain samples
+        from the bcbio running time frame.
+
+        :param collectl_path:   the path of the collectl file
+        :param timestamp:       the timestamp from the collectl file name
+        :param time_frame:      the bcbio running time frame
+        """
+        started = self.timestamp(
+            datetime.datetime.strptime(timestamp, "%Y%m%d-%H%M%S"))
+        if started - self._WINDOW_SLACK > self.timestamp(time_frame.end):
+            return False
+
+        # The Collector keeps the modified time of the remote file.
+        modified = os.path.getmtime(collectl_path)
+        if modified + self._WINDOW_SLACK < self.timestamp(time_frame.start):
+            return False
+
+        return True
+
+    def _downsample(self, data):
+        """Split the received data in buckets and compute the required
+        aggregations for each metric.
+
+        The `mean` aggregation keeps the original name of the metric,
+        the other ones will be suffixed with the aggregation name
+        (Ex: `cpu_user_max`).
+        """
+        if not self._resample or len(data) == 0:
+            return data
+
+        index = data.index
+        if not isinstance(index, pandas.DatetimeIndex):
+            data.index = pandas.to_datetime(index, unit="s")
+
+        buckets = data.groupby(pandas.Grouper(freq=self._resample))
+        frames = []
+        for aggregation in self._aggregations:
+            frame = buckets.agg(aggregation)
+            if aggregation != "mean":
+                frame.columns = ["%(metric)s_%(aggregation)s" %
+                                 {"metric": column,
+                                  "aggregation": aggregation}
+                                 for column in frame.columns]
+            frames.append(frame)
+
+        output = pandas.concat(frames, axis=1).dropna(how="all")
+        if not isinstance(index, pandas.DatetimeIndex):
+            output.index = output.index.astype(numpy.int64) // 10 ** 9
+
+        return output
+
     def run(self):
         """Parse the information.
 
@@ -228,29 +304,219 @@ class Parser(object):
                  regarding timing.
         :type return: tuple
         """
-        data_frames = {}
+        data_frames = collections.defaultdict(list)
         hardware_info = {}
         time_frame = self._time_frame()
 
         for collectl_file in sorted(os.listdir(self._rawdir)):
-            if not collectl_file.endswith(self.COLLECTL_SUFFIX):
+            match = self.COLLECTL_FILE.match(collectl_file)
+            if not match:
                 continue
 
             collectl_path = os.path.join(self._rawdir, collectl_file)
+            if not self._in_time_frame(collectl_path,
+                                       match.group("timestamp"),
+                                       time_frame):
+                LOG.debug("Skipping %(file)s: out of the bcbio time frame.",
+                          {"file": collectl_file})
+                continue
+
             data, hardware = graph.load_collectl(
                 collectl_path, time_frame.start, time_frame.end)
 
             if len(data) == 0:
                 continue
 
-            host = re.sub(r'-\d{8}-\d{6}\.raw\.gz$', '', collectl_file)
+            host = match.group("host")
             hardware_info[host] = hardware
-            if host not in data_frames:
-                data_frames[host] = data
-            else:
-                data_frames[host] = pandas.concat([data_frames[host], data])
+            data_frames[host].append(self._downsample(data))
+
+        for host, frames in data_frames.items():
+            data_frames[host] = pandas.concat(frames)
+
+        return (dict(data_frames), hardware_info, time_frame.steps)
+
+
+class Summary(object):
+
+    """Summarize the resource usage of the whole cluster for each
+    bcbio step.
+
+    ::
+        data, hardware, _ = Parser(bcbio_log, rawdir).run()
+        summary = Summary(bcbio_log, data, hardware)
+        print(summary().text())
+    """
+
+    CPU_BUSY = ("cpu_user", "cpu_nice", "cpu_sys")
+    MEMORY_TOTAL = "mem_total"
+    MEMORY_FREE = ("mem_free", "mem_buffers", "mem_cached")
+    DISK_COUNTERS = ("_sectors_read", "_sectors_written")
+    NETWORK_COUNTERS = ("_rbyte", "_tbyte")
+
+    _JIFFIES = 100          # USER_HZ
+    _SECTOR_SIZE = 512      # bytes
+    _MEGABYTE = 1024 ** 2
+
+    def __init__(self, bcbio_log, data_frames, hardware_info):
+        """
+        :param bcbio_log:       the bcbio log path
+        :param data_frames:     an instance of :pandas.DataFrame: for
+                                each host (see :meth Parser.run:)
+        :param hardware_info:   the hardware configuration for each host
+        """
+        self._bcbio_log = bcbio_log
+        self._data_frames = data_frames
+        self._hardware_info = hardware_info
+
+    def __call__(self):
+        """Allows an instance of a class to be called as a function."""
+        return self.run()
+
+    def _steps(self):
+        """The bcbio steps and their boundaries.
+
+        :return:    a tuple with the names of the steps and the number of
+                    seconds since the epoch for each boundary (the last
+                    timing marks the end of the last step)
+        """
+        timings = sorted(graph.get_bcbio_timings(self._bcbio_log).items())
+        names = [name for _, name in timings[:-1]]
+        boundaries = numpy.array([Parser.timestamp(moment)
+                                  for moment, _ in timings], dtype=float)
+        return names, boundaries
+
+    @staticmethod
+    def _seconds(index):
+        """Return the number of seconds since the epoch for each sample."""
+        if isinstance(index, pandas.DatetimeIndex):
+            return index.asi8 / 1e9
+        return numpy.asarray(index, dtype=float)
+
+    @staticmethod
+    def _counters(data, suffixes):
+        """Return the sum of the columns ending with the received
+        suffixes.
+        """
+        columns = [column for column in data.columns
+                   if column.endswith(suffixes)]
+        if not columns:
+            return None
+        return data[columns].values.astype(float).sum(axis=1)
+
+    @staticmethod
+    def _rate(values, seconds, first, last):
+        """The average growth per second of a counter for each step."""
+        if values is None:
+            return numpy.zeros(len(first))
+
+        elapsed = seconds[last] - seconds[first]
+        delta = values[last] - values[first]
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            return numpy.where(elapsed > 0, delta / elapsed, 0.0)
+
+    def _memory_used(self, data):
+        """The used memory for each sample, in megabytes."""
+        if self.MEMORY_TOTAL not in data.columns:
+            return None
+
+        used = data[self.MEMORY_TOTAL].values.astype(float)
+        for column in self.MEMORY_FREE:
+            if column in data.columns:
+                used = used - data[column].values.astype(float)
+        # Note: The memory information is reported in kilobytes.
+        return used / 1024
 
-        return (data_frames, hardware_info, time_frame.steps)
+    def _host_usage(self, data, boundaries):
+        """Compute the resource usage of the received host for each step.
+
+        :return:    a dictionary with an array for each metric
+        """
+        if len(data) == 0:
+            return {metric: numpy.zeros(len(boundaries) - 1)
+                    for metric in ("cpu", "disk", "network", "memory")}
+
+        data = data.sort_index()
+        seconds = self._seconds(data.index)
+        positions = numpy.searchsorted(seconds, boundaries)
+        start, end = positions[:-1], positions[1:]
+        has_samples = end > start
+        # The first and the last sample from each step.
+        first = numpy.where(has_samples, start, 0)
+        last = numpy.where(has_samples, end - 1, 0)
+
+        usage = {
+            "cpu": self._rate(self._counters(data, self.CPU_BUSY), seconds,
+                              first, last) / self._JIFFIES,
+            "disk": self._rate(self._counters(data, self.DISK_COUNTERS),
+                               seconds, first, last) * self._SECTOR_SIZE,
+            "network": self._rate(self._counters(data,
+                                                 self.NETWORK_COUNTERS),
+                                  seconds, first, last),
+            "memory": numpy.zeros(len(start)),
+        }
+
+        memory = self._memory_used(data)
+        if memory is not None:
+            for step in numpy.flatnonzero(has_samples):
+                usage["memory"][step] = memory[start[step]:end[step]].max()
+
+        return usage
+
+    def run(self):
+        """Compute the resource usage for each bcbio step.
+
+        :return:    an instance of :class bcbiovm.common.objects.Report:
+        """
+        names, boundaries = self._steps()
+        total = {"cpu": numpy.zeros(len(names)),
+                 "disk": numpy.zeros(len(names)),
+                 "network": numpy.zeros(len(names)),
+                 "memory": numpy.zeros(len(names))}
+        cpus = 0
+
+        for host, data in self._data_frames.items():
+            usage = self._host_usage(data, boundaries)
+            for metric in ("cpu", "disk", "network"):
+                total[metric] += usage[metric]
+            total["memory"] = numpy.maximum(total["memory"], usage["memory"])
+            cpus += self._hardware_info.get(host, {}).get("num_cpus", 0)
+
+        report = objects.Report()
+        cluster = report.add_section(
+            name="cluster", title="Cluster resources",
+            fields=[{"name": "hosts"}, {"name": "cpus"}])
+        cluster.add_item([len(self._data_frames), cpus])
+
+        steps = report.add_section(
+            name="steps", title="Resource usage for each bcbio step",
+            description="The CPU, disk and network usage are aggregated "
+                        "across all the hosts, the memory is the highest "
+                        "usage of a single host.",
+            fields=[{"name": "step", "title": "Step"},
+                    {"name": "duration", "title": "Duration (s)"},
+                    {"name": "cpu", "title": "CPU cores used"},
+                    {"name": "cpu_utilization",
+                     "title": "CPU utilization (%)"},
+                    {"name": "memory", "title": "Memory peak (MB)"},
+                    {"name": "disk", "title": "Disk I/O (MB/s)"},
+                    {"name": "network", "title": "Network I/O (MB/s)"}])
+
+        durations = numpy.diff(boundaries)
+        utilization = (total["cpu"] / cpus * 100 if cpus
+                       else numpy.zeros(len(names)))
+        for index, name in enumerate(names):
+            steps.add_item([
+                name,
+                int(durations[index]),
+                round(float(total["cpu"][index]), 2),
+                round(float(utilization[index]), 2),
+                round(float(total["memory"][index]), 2),
+                round(float(total["disk"][index]) / self._MEGABYTE, 2),
+                round(float(total["network"][index]) / self._MEGABYTE, 2),
+            ])
+
+        return report
 
 
 class Report(object):
@@ -258,18 +524,127 @@ class Report(object):
     """
     Collect information from the cluster and create a container
     with them.
+
+    When a stream writer is provided, the sections and the rows are
+    written as soon as they are fetched, instead of being collected
+    in a :class:`objects.Report`.
     """
 
-    def __init__(self, config, cluster):
+    # The number of reservations requested for each page.
+    PAGE_SIZE = 500
+
+    def __init__(self, config, cluster, writer=None):
         """
         :param config:    elasticluster config file
         :param cluster:   cluster name
+        :param writer:    an instance of :class:`objects.StreamWriter`
         """
-        self._information = objects.Report()
+        self._information = writer or objects.Report()
         self._elasticluster = cluster_ops.ElastiCluster(
             provider=constant.PROVIDER.AWS)
         self._elasticluster.load_config(config)
         self._cluster_config = self._elasticluster.get_config(cluster)
+        self._cache = {}
+        self._locks = collections.defaultdict(threading.Lock)
+        self._lock = threading.Lock()
+
+    def _cached(self, name, fetch):
+        """Return the result of the received API call, calling it only
+        once for each report.
+        """
+        with self._lock:
+            lock = self._locks[name]
+
+        with lock:
+            if name not in self._cache:
+                self._cache[name] = fetch()
+            return self._cache[name]
+
+    def _region(self):
+        """The region used by the cluster."""
+        return toolz.get_in(["cloud", "ec2_region"], self._cluster_config)
+
+    def _iam_users(self):
+        """The response for the list of IAM users."""
+        return self._cached(
+            "iam_users", lambda: aws_connection.get("iam").get_all_users())
+
+    def _security_groups(self):
+        """The security groups from the region used by the cluster."""
+        return self._cached(
+            "security_groups",
+            lambda: aws_connection.get(
+                "ec2", self._region()).get_all_security_groups())
+
+    def _vpcs(self):
+        """All the available VPCs."""
+        return self._cached(
+            "vpcs", lambda: aws_connection.get("vpc").get_all_vpcs())
+
+    def _reservations_page(self, next_token=None):
+        """Return a page of reservations from the region used by
+        the cluster.
+        """
+        return aws_connection.get("ec2", self._region()).get_all_reservations(
+            max_results=self.PAGE_SIZE, next_token=next_token)
+
+    def _reservations(self):
+        """The first page of reservations from the region used by
+        the cluster.
+        """
+        return self._cached("reservations", self._reservations_page)
+
+    def _instances(self):
+        """Iterate over the instances from the region used by the
+        cluster, fetching the pages of reservations only when they
+        are required.
+        """
+        page = self._reservations()
+        while True:
+            for reservation in page:
+                for instance in reservation.instances:
+                    yield instance
+            next_token = getattr(page, "next_token", None)
+            if not next_token:
+                break
+            page = self._reservations_page(next_token)
+
+    def prefetch(self):
+        """Issue all the API calls required by the report concurrently."""
+        errors = []
+
+        def _fetch(method):
+            """Call the received method and keep the raised exception."""
+            try:
+                method()
+            except Exception:    # pylint: disable=broad-except
+                errors.append(sys.exc_info())
+
+        workers = []
+        for method in (self._iam_users, self._security_groups, self._vpcs,
+                       self._reservations):
+            worker = threading.Thread(target=_fetch, args=(method, ))
+            worker.daemon = True
+            worker.start()
+            workers.append(worker)
+
+        for worker in workers:
+            worker.join()
+
+        if errors:
+            six.reraise(*errors[0])
+
+    def collect(self):
+        """Collect all the information available and return the report
+        (or the stream writer which received it).
+        """
+        self.prefetch()
+        self.add_cluster_info()
+        self.add_iam_info()
+        self.add_security_groups_info()
+        self.add_vpc_info()
+        self.add_instance_info()
+        return self.digest()
 
     def add_cluster_info(self):
         """Add information regarding the cluster."""
@@ -280,7 +655,8 @@ class Report(object):
             name="cluster", title="Cluster configuration",
             description="Provide high level details about the setup of the "
                         "current cluster.",
-            fields=[{"name": "name"}, {"name": "value"}])
+            fields=[{"name": "name", "width": 15},
+                    {"name": "value", "width": 60}])
         cluster.add_item([
             "Frontend node",
             {"flavor": frontend_c["flavor"],
@@ -296,62 +672,59 @@ class Report(object):
         """Add information regarding AWS Identity and Access Management."""
         expect_iam_username = "bcbio"
         iam = self._information.add_section(
-            name="iam", title="AWS Identity and Access Management")
-        iam.add_field("iam", "IAM Users")
+            name="iam", title="AWS Identity and Access Management",
+            fields=[{"name": "iam", "title": "IAM Users"}])
 
-        iam_connection = boto.iam.connection.IAMConnection()
-        all_users = iam_connection.get_all_users()
+        all_users = self._iam_users()
         users = toolz.get_in([u"list_users_response", u"list_users_result",
                               "users"], all_users, None)
         if not users:
             LOG.warning("No Identity and Access Management(IAM) users exists.")
             return
 
-        if expect_iam_username in users:
+        user_names = [user.get("user_name") for user in users]
+        if expect_iam_username in user_names:
             LOG.info("Expected IAM user %(user)s exists",
                      {"user": expect_iam_username})
         else:
             LOG.warning("IAM user %(user)s does not exist.",
                         {"user": expect_iam_username})
 
-        iam.add_items(users)
+        iam.add_items(user_names)
 
     def add_security_groups_info(self):
         """Add information regarding security groups."""
         sg_section = self._information.add_section(
-            name="sg", title="Security groups")
-        sg_section.add_field("sg", "Security Group")
+            name="sg", title="Security groups",
+            fields=[{"name": "sg", "title": "Security Group"}])
 
-        region = toolz.get_in(["cloud", "ec2_region"], self._cluster_config)
         expected_sg_name = toolz.get_in(["cluster", "security_group"],
                                         self._cluster_config)
-
-        conn = boto.ec2.connect_to_region(region)
-        security_groups = conn.get_all_security_groups()
+        security_groups = self._security_groups()
 
         if not security_groups:
             LOG.warning("No security groups defined.")
             return
 
-        if expected_sg_name in security_groups:
+        sg_names = [security_group.name for security_group in security_groups]
+        if expected_sg_name in sg_names:
             LOG.info("Expected security group %(sg_name)s exists.",
                      {"sg_name": expected_sg_name})
         else:
             LOG.warning("Security group %(sg_name)s does not exist.",
                         {"sg_name": expected_sg_name})
 
-        sg_section.add_items(security_groups)
+        sg_section.add_items(sg_names)
 
     def add_vpc_info(self):
         """Add information regarding Amazon Virtual Private Cloud."""
         vpc_section = self._information.add_section(
-            name="vpc", title="Amazon Virtual Private Cloud.")
-        vpc_section.add_field("vpc", "Virtual Private Cloud")
+            name="vpc", title="Amazon Virtual Private Cloud.",
+            fields=[{"name": "vpc", "title": "Virtual Private Cloud"}])
 
         expected_vpc_name = toolz.get_in(["cloud", "vpc"],
                                          self._cluster_config)
-        vpc_connection = boto.vpc.VPCConnection()
-        all_vpcs = vpc_connection.get_all_vpcs()
+        all_vpcs = self._vpcs()
         if not all_vpcs:
             LOG.warning("No VPCs exists.")
             return
@@ -366,44 +739,37 @@ class Report(object):
         vpc_section.add_items(vpc_names)
 
     def add_instance_info(self):
-        """Add information regarding each instance from cluster."""
+        """Add information regarding each instance from cluster.
+
+        The instances are added page by page, as the reservations are
+        fetched.
+        """
         instance_section = self._information.add_section(
-            name="instance", title="Instances from current cluster"
-        )
-        instance_section.add_field("name", "Name")
-        instance_section.add_field("type", "Type")
-        instance_section.add_field("state", "State")
-        instance_section.add_field("ip", "IP Address")
-        instance_section.add_field("placement", "Placement")
+            name="instance", title="Instances from current cluster",
+            fields=[{"name": "name", "title": "Name"},
+                    {"name": "type", "title": "Type", "width": 12},
+                    {"name": "state", "title": "State", "width": 12},
+                    {"name": "ip", "title": "IP Address", "width": 15},
+                    {"name": "placement", "title": "Placement",
+                     "width": 12}])
 
-        vpcs_by_id = {}
-        region = toolz.get_in(["cloud", "ec2_region"], self._cluster_config)
         vpc_name = toolz.get_in(["cloud", "vpc"], self._cluster_config)
-
-        vpc_connection = boto.vpc.VPCConnection()
-        ec2_connection = boto.ec2.connect_to_region(region)
-
-        all_vpcs = vpc_connection.get_all_vpcs()
-        reservations = ec2_connection.get_all_reservations()
-
-        for vpc in all_vpcs:
+        vpcs_by_id = {}
+        for vpc in self._vpcs():
             vpcs_by_id[vpc.id] = vpc.tags.get('Name', "")
 
-        for res in reservations:
-            for instance in res.instances:
-                if vpcs_by_id.get(instance.vpc_id) != vpc_name:
-                    continue
-
-                ip_address = instance.ip_address
-                if not instance.ip_address:
-                    ip_address = instance.private_ip_address
+        for instance in self._instances():
+            if vpcs_by_id.get(instance.vpc_id) != vpc_name:
+                continue
 
-                instance_section.add_item([
-                    instance.tags.get("Name", None),
-                    instance.instance_type,
-                    instance.state, ip_address, instance.placement
-                ])
+            instance_section.add_item([
+                instance.tags.get("Name", None),
+                instance.instance_type,
+                instance.state,
+                instance.ip_address or instance.private_ip_address,
+                instance.placement
+            ])
 
     def digest(self):
-        """Return the report."""
+        """Return the report (or the stream writer which received it)."""
         return self._information
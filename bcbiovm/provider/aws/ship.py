@@ -7,6 +7,7 @@ from bcbio import utils
 from bcbio.pipeline import config_utils
 
 from bcbiovm.common import objects
+from bcbiovm.common import runner
 from bcbiovm.provider.aws import storage as aws_storage
 from bcbiovm.container.docker import remap as docker_remap
 from bcbiovm.provider import base
@@ -64,11 +65,15 @@ class S3Pack(base.Pack):
         dirname = os.path.dirname(os.path.abspath(orig_fname))
         store = remap_dict[os.path.normpath(dirname)]
 
+        commands = []
         for filename in utils.file_plus_index(orig_fname):
             keyname = "%s/%s" % (store["folder"], os.path.basename(filename))
             if not self._storage.exists(store["container"], keyname):
-                self._storage.upload(path=filename, filename=keyname,
-                                     container=store["container"])
+                commands.append(self._storage.upload_command(
+                    path=filename, filename=keyname,
+                    container=store["container"]))
+        runner.run(commands, check_exit_code=True, stream=True,
+                   capture=False)
 
         # Drop directory information since we only deal with files in S3
         s3_name = "s3://%s/%s/%s" % (store["container"], store["folder"],
@@ -3,12 +3,13 @@
 import os
 
 import boto
-import yaml
 from bcbio import utils as bcbio_utils
 from bcbio.distributed import objectstore
 
+from bcbiovm.common import serialization
 from bcbiovm.common import utils as common_utils
 from bcbiovm.provider import storage
+from bcbiovm.provider.aws import connection as aws_connection
 
 
 class AmazonS3(storage.StorageManager, objectstore.AmazonS3):
@@ -23,7 +24,7 @@ class AmazonS3(storage.StorageManager, objectstore.AmazonS3):
     @classmethod
     def get_bucket(cls, bucket_name):
         """Retrieves a bucket by name."""
-        connection = boto.connect_s3()
+        connection = aws_connection.get("s3")
         try:
             # If the bucket does not exist, an S3ResponseError
             # will be raised.
@@ -55,8 +56,8 @@ class AmazonS3(storage.StorageManager, objectstore.AmazonS3):
         return True if key else False
 
     @classmethod
-    def upload(cls, path, filename, container, context=None):
-        """Upload the received file.
+    def upload_command(cls, path, filename, container, context=None):
+        """Return the command which uploads the received file.
 
         :path:      The path of the file that should be uploaded.
         :container: The name of the bucket.
@@ -74,13 +75,26 @@ class AmazonS3(storage.StorageManager, objectstore.AmazonS3):
             for header, value in headers.items():
                 command.extend(("-m", "{0}:{1}".format(header, value)))
 
-        common_utils.execute(command, check_exit_code=True)
+        return command
+
+    @classmethod
+    def upload(cls, path, filename, container, context=None):
+        """Upload the received file.
+
+        :path:      The path of the file that should be uploaded.
+        :container: The name of the bucket.
+        :filename:  The name of the key.
+        :context:   More information required by the storage manager.
+        """
+        command = cls.upload_command(path, filename, container, context)
+        common_utils.execute(command, check_exit_code=True, stream=True,
+                             capture=False)
 
     @classmethod
     def load_config(cls, sample_config):
         """Move a sample configuration locally, providing remote upload."""
         with cls.open(sample_config) as s3_handle:
-            config = yaml.load(s3_handle)
+            config = serialization.load(s3_handle)
 
         # The file_info is a namedtuple which contains the following fields:
         # ["store", "bucket", "key", "region"]
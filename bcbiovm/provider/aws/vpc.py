@@ -3,11 +3,10 @@ Create a VPC and associated resources for running bcbio on AWS.
 """
 import re
 
-import boto.ec2
-
 from bcbiovm import log as logging
 from bcbiovm.common import cluster as clusterops
 from bcbiovm.common import constant
+from bcbiovm.provider.aws import connection as aws_connection
 
 LOG = logging.get_logger(__name__)
 
@@ -117,9 +116,8 @@ class VirtualPrivateCloud(object):
 
     def run(self):
         """Create and setup the Virtual Private Cloud."""
-        connection = boto.connect_vpc(
-            aws_access_key_id=self._key_id,
-            aws_secret_access_key=self._access_key)
+        connection = aws_connection.get("vpc", access_key=self._key_id,
+                                        secret_key=self._access_key)
 
         if self._recreate:
             vpc = self._recreate_vpc(connection)
@@ -1 +0,0 @@
-from bcbiovm.provider.azure.azure_provider import AzureProvider
@@ -95,7 +95,7 @@ class AzureProvider(base.BaseCloudProvider):
         """
         return self._STORAGE.get(name)()
 
-    def information(self, config, cluster):
+    def information(self, config, cluster, writer=None):
         """
         Get all the information available for this provider.
 
@@ -104,6 +104,7 @@ class AzureProvider(base.BaseCloudProvider):
 
         :config:          elasticluster config file
         :cluster:         cluster name
+        :writer:          an instance of :class:`objects.StreamWriter`
         """
         raise exception.NotSupported(feature="Method information",
                                      context="Azure provider")
@@ -129,7 +130,7 @@ class AzureProvider(base.BaseCloudProvider):
         raise exception.NotSupported(feature="Method collect_data",
                                      context="Azure provider")
 
-    def resource_usage(self, bcbio_log, rawdir):
+    def resource_usage(self, bcbio_log, rawdir, resample=None):
         """Generate system statistics from bcbio runs.
 
         Parse the files obtained by the :meth colect_data: and put the
@@ -137,6 +138,8 @@ class AzureProvider(base.BaseCloudProvider):
 
         :param bcbio_log:   local path to bcbio log file written by the run
         :param rawdir:      directory to put raw data files
+        :param resample:    the length of the buckets used for
+                            downsampling the data (Ex: "10s", "60s")
 
         :return: a tuple with two dictionaries, the first contains
                  an instance of :pandas.DataFrame: for each host and
@@ -147,17 +150,31 @@ class AzureProvider(base.BaseCloudProvider):
         raise exception.NotSupported(feature="Method resource_usage",
                                      context="Azure provider")
 
-    def bootstrap(self, config, cluster, reboot):
+    def resource_summary(self, bcbio_log, rawdir, resample=None):
+        """Summarize the resource usage of the whole cluster for each
+        bcbio step.
+
+        :param bcbio_log:   local path to bcbio log file written by the run
+        :param rawdir:      directory to put raw data files
+        :param resample:    the length of the buckets used for
+                            downsampling the data (Ex: "10s", "60s")
+        """
+        raise exception.NotSupported(feature="Method resource_summary",
+                                     context="Azure provider")
+
+    def bootstrap(self, config, cluster, reboot, force=False):
         """Install or update the bcbio-nextgen code and the tools
         with the latest version available.
 
         :param config:    elasticluster config file
         :param cluster:   cluster name
         :param reboot:    whether to upgrade and restart the host OS
+        :param force:     run the playbooks even if nothing changed
+                          since their last run
         """
         bootstrap = common_bootstrap.Bootstrap(provider=self, config=config,
                                                cluster_name=cluster,
-                                               reboot=reboot)
+                                               reboot=reboot, force=force)
         return bootstrap.run()
 
     def upload_biodata(self, genome, target, source, context):
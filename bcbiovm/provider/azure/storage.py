@@ -4,13 +4,13 @@ import collections
 import os
 
 import azure
-import yaml
 from azure import storage as azure_storage
 from bcbio import utils as bcbio_utils
 from bcbio.distributed import objectstore
 
 from bcbiovm import config as bcbiovm_config
 from bcbiovm.common import exception
+from bcbiovm.common import serialization
 from bcbiovm.provider import storage
 
 
@@ -113,7 +113,7 @@ class AzureBlob(storage.StorageManager, objectstore.AzureBlob):
     def load_config(cls, sample_config):
         """Move a sample configuration locally, providing remote upload."""
         with cls.open(sample_config) as blob_handle:
-            config = yaml.load(blob_handle)
+            config = serialization.load(blob_handle)
 
         # The file_info is a namedtuple which contains the following fields:
         # ["store", "storage", "container", "blob"]
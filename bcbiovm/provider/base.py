@@ -4,7 +4,6 @@
 """
 import abc
 import os
-import yaml
 
 import paramiko
 import six
@@ -15,6 +14,7 @@ from bcbio.pipeline import config_utils
 
 from bcbiovm import log as logging
 from bcbiovm.common import cluster as clusterops
+from bcbiovm.common import serialization
 from bcbiovm.container.docker import remap as docker_remap
 
 LOG = logging.get_logger(__name__)
@@ -61,7 +61,7 @@ class BaseCloudProvider(object):
         pass
 
     @abc.abstractmethod
-    def information(self, cluster, config):
+    def information(self, cluster, config, writer=None):
         """
         Get all the information available for this provider.
 
@@ -70,8 +70,12 @@ class BaseCloudProvider(object):
 
         :config:    elasticluster config file
         :cluster:   cluster name
+        :writer:    an instance of :class bcbio.common.objects.StreamWriter:
+                    which receives the sections and the rows as soon as
+                    they are fetched
 
         :return:    an instance of :class bcbio.common.objects.Report:
+                    or the received writer
         """
         pass
 
@@ -97,7 +101,7 @@ class BaseCloudProvider(object):
         pass
 
     @abc.abstractmethod
-    def resource_usage(self, bcbio_log, rawdir):
+    def resource_usage(self, bcbio_log, rawdir, resample=None):
         """Generate system statistics from bcbio runs.
 
         Parse the files obtained by the :meth colect_data: and put the
@@ -105,6 +109,8 @@ class BaseCloudProvider(object):
 
         :param bcbio_log:   local path to bcbio log file written by the run
         :param rawdir:      directory to put raw data files
+        :param resample:    the length of the buckets used for
+                            downsampling the data (Ex: "10s", "60s")
 
         :return: a tuple with two dictionaries, the first contains
                  an instance of :pandas.DataFrame: for each host and
@@ -115,13 +121,29 @@ class BaseCloudProvider(object):
         pass
 
     @abc.abstractmethod
-    def bootstrap(self, cluster, config, reboot):
+    def resource_summary(self, bcbio_log, rawdir, resample=None):
+        """Summarize the resource usage of the whole cluster for each
+        bcbio step.
+
+        :param bcbio_log:   local path to bcbio log file written by the run
+        :param rawdir:      directory to put raw data files
+        :param resample:    the length of the buckets used for
+                            downsampling the data (Ex: "10s", "60s")
+
+        :return:    an instance of :class bcbio.common.objects.Report:
+        """
+        pass
+
+    @abc.abstractmethod
+    def bootstrap(self, cluster, config, reboot, force=False):
         """Install or update the the bcbio code and the tools with
         the latest version available.
 
         :param config:    elasticluster config file
         :param cluster:   cluster name
         :param reboot:    whether to upgrade and restart the host OS
+        :param force:     run the playbooks even if nothing changed
+                          since their last run
         """
         pass
 
@@ -398,12 +420,10 @@ class Reconstitute(object):
         if utils.file_exists(default_system):
             return
 
-        with open(default_system, "w") as out_handle:
-            _, data = config_utils.get_dataarg(args)
-            output = {"resources": toolz.get_in(["config", "resources"],
-                                                data, {})}
-            yaml.safe_dump(output, out_handle, default_flow_style=False,
-                           allow_unicode=False)
+        _, data = config_utils.get_dataarg(args)
+        output = {"resources": toolz.get_in(["config", "resources"],
+                                            data, {})}
+        serialization.write(output, default_system)
 
     def prepare_datadir(self, pack, args):
         """Prepare the biodata directory.
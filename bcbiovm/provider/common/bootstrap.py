@@ -3,35 +3,166 @@ Helper class for updating or installing the bcbio and its requirements.
 """
 
 import collections
+import fcntl
+import hashlib
+import json
+import multiprocessing
 import os
+import pickle
+import threading
+import traceback
 
+from six.moves import queue
 import toolz
 from bcbio.distributed import ipython
 
 from bcbiovm import config as bcbio_config
+from bcbiovm import log as logging
 from bcbiovm.common import cluster as clusterops
+from bcbiovm.common import exception
 from bcbiovm.provider.common import playbook as common_playbook
 
+LOG = logging.get_logger(__name__)
+
+# Note: Defined at module level in order to be sent back by the
+#       processes which run the playbooks.
+Response = collections.namedtuple(
+    "Response", ["status", "unreachable", "failures", "timings"])
+
+
+class FingerprintStore(object):
+
+    """Keep track of the playbooks successfully executed on each node.
+
+    The fingerprint of a playbook is the hash of the playbook content,
+    the extra variables and the inventory used for running it.
+
+    The nodes are identified by their name and their instance ID, since
+    Elasticluster reuses the node names when a cluster is recreated.
+    """
+
+    def __init__(self, path):
+        """
+        :param path:  the path of the file which contains
+                      the fingerprints
+        """
+        self._path = path
+        self._lock = threading.Lock()
+        self._fingerprints = self._load()
+
+    def _load(self):
+        """Load the fingerprints from the store file."""
+        if not os.path.exists(self._path):
+            return {}
+        try:
+            with open(self._path, "r") as file_handle:
+                return json.load(file_handle)
+        except ValueError:
+            LOG.warning("Ignoring the invalid fingerprint store %(path)r.",
+                        {"path": self._path})
+            return {}
+
+    def _save(self):
+        """Write the fingerprints in the store file."""
+        temp_path = "%s.tmp" % self._path
+        with open(temp_path, "w") as file_handle:
+            json.dump(self._fingerprints, file_handle, indent=2,
+                      sort_keys=True)
+        os.rename(temp_path, self._path)
+
+    @staticmethod
+    def _playbook_files(playbook):
+        """Return all the files which belong to the received playbook.
+
+        For the playbooks from a role all the files from the role
+        (templates, handlers etc.) are considered.
+        """
+        tasks_dir = os.path.dirname(playbook)
+        if os.path.basename(tasks_dir) != "tasks":
+            return [playbook]
+
+        files = []
+        for root, _, filenames in os.walk(os.path.dirname(tasks_dir)):
+            files.extend(os.path.join(root, filename)
+                         for filename in filenames)
+        return sorted(files)
+
+    @classmethod
+    def fingerprint(cls, playbook, extra_vars, inventory):
+        """Compute the fingerprint for the received playbook.
+
+        :param playbook:    the path to a playbook file
+        :param extra_vars:  the extra variables used by the playbook
+        :param inventory:   the path to the inventory hosts file
+        """
+        digest = hashlib.sha256()
+        for path in cls._playbook_files(playbook) + [inventory]:
+            digest.update(path.encode("utf-8"))
+            with open(path, "rb") as file_handle:
+                digest.update(file_handle.read())
+        digest.update(json.dumps(extra_vars, sort_keys=True,
+                                 default=str).encode("utf-8"))
+        return digest.hexdigest()
+
+    def match(self, playbook_name, nodes, fingerprint):
+        """Check if the received fingerprint was recorded for all
+        the nodes.
+        """
+        recorded = self._fingerprints.get(playbook_name, {})
+        return bool(nodes) and all(recorded.get(node) == fingerprint
+                                   for node in nodes)
+
+    def record(self, playbook_name, nodes, fingerprint):
+        """Record the fingerprint of the playbook for the received
+        nodes, replacing the records of the nodes which are no longer
+        part of the cluster.
+
+        The store file is reloaded under an exclusive lock before it
+        is written, in order to keep the fingerprints recorded by the
+        playbooks which run in other processes.
+        """
+        with self._lock, open("%s.lock" % self._path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            self._fingerprints = self._load()
+            self._fingerprints[playbook_name] = {
+                node: fingerprint for node in nodes}
+            self._save()
+
 
 class Bootstrap(object):
 
     """Update or install the bcbio and its requirements."""
 
-    _RESPONSE = collections.namedtuple("Response",
-                                       ["status", "unreachable", "failures"])
+    _RESPONSE = Response
     PLAYBOOK_ORDER = ("docker", "gof3r", "nfs", "bcbio")
+    # Note: The playbooks without dependencies between them are
+    #       executed concurrently, each one in its own process, since
+    #       Ansible keeps the state of the running playbook (the
+    #       current runner, the configuration) at the process level.
+    PLAYBOOK_DEPENDENCIES = {
+        "docker": (),
+        "gof3r": (),
+        "nfs": (),
+        "bcbio": ("docker", "gof3r", "nfs"),
+    }
+    # The number of seconds between the checks of the worker processes.
+    _POLL_INTERVAL = 1
 
-    def __init__(self, provider, config, cluster_name, reboot, playbook=None):
+    def __init__(self, provider, config, cluster_name, reboot, playbook=None,
+                 force=False):
         """
         :param provider:       an instance of
                                :class bcbiovm.provider.base.BaseCloudProvider:
         :param config:         elasticluster config file
         :param cluster_name:   cluster name
         :param reboot:         whether to upgrade and restart the host OS
+        :param force:          run the playbooks even if they were already
+                               executed with the same configuration
         """
         self._config = config
         self._cluster_name = cluster_name
         self._reboot = reboot
+        self._force = force
         self._provider = provider
         self._playbook = playbook if playbook else common_playbook.Playbook()
 
@@ -41,24 +172,67 @@ class Bootstrap(object):
         self._inventory_path = os.path.join(
             self._cluster.repository.storage_path,
             "ansible-inventory.%(cluster)s" % {"cluster": cluster_name})
+        self._fingerprints = FingerprintStore(os.path.join(
+            self._cluster.repository.storage_path,
+            "fingerprints.%(cluster)s.json" % {"cluster": cluster_name}))
 
-    def _run_playbook(self, playbook, extra_vars=None):
+    def _nodes(self):
+        """Return the nodes from the inventory file, identified by
+        their name and their instance ID.
+        """
+        instances = {node.name: getattr(node, "instance_id", None)
+                     for node in self._cluster.get_all_nodes()}
+        nodes = set()
+        with open(self._inventory_path) as file_handle:
+            for line in file_handle.readlines():
+                line = line.strip()
+                if line and not line.startswith(("[", "#")):
+                    name = line.split()[0]
+                    nodes.add("%s/%s" % (name, instances.get(name)))
+        return sorted(nodes)
+
+    def _run_playbook(self, playbook, extra_vars=None, name=None):
         """Run a playbook and return the result.
 
+        The playbook is skipped if it was already executed successfully
+        on all the nodes with the same playbook content, extra variables
+        and inventory.
+
         :param playbook_path:   the path to a playbook file
         :param extra_args:      is an option function that should return
                                 extra variables to pass to ansible given
                                 the arguments and cluster configuration
+        :param name:            the name of the playbook
         """
+        variables = {}
+        if extra_vars:
+            variables = extra_vars(
+                self._ecluster.get_config(self._cluster_name))
+
+        name = name or playbook
+        nodes = self._nodes()
+        fingerprint = self._fingerprints.fingerprint(
+            playbook, variables, self._inventory_path)
+        if (not self._force and
+                self._fingerprints.match(name, nodes, fingerprint)):
+            LOG.info("Skipping the %(playbook)r playbook, nothing changed "
+                     "since the last run.", {"playbook": name})
+            return self._RESPONSE(True, [], {}, None)
+
         playbook = clusterops.AnsiblePlaybook(
             inventory_path=self._inventory_path,
             playbook_path=playbook,
             config=self._config,
             cluster=self._cluster_name,
-            extra_vars=extra_vars,
+            extra_vars=lambda _: variables,
             provider=self._provider.name)
         playbook_response = playbook.run()
-        return self._RESPONSE(not any(playbook_response), *playbook_response)
+        response = self._RESPONSE(not any(playbook_response),
+                                  *playbook_response,
+                                  timings=playbook.timings)
+        if response.status:
+            self._fingerprints.record(name, nodes, fingerprint)
+        return response
 
     def bcbio(self):
         """Install bcbio_vm and docker container with tools.
@@ -91,15 +265,16 @@ class Bootstrap(object):
                 "bcbio_channels": bcbio_config["conda.channels"]
             }
 
-        return self._run_playbook(self._playbook.bcbio, _extra_vars)
+        return self._run_playbook(self._playbook.bcbio, _extra_vars,
+                                  name="bcbio")
 
     def docker(self):
         """Install docker."""
-        return self._run_playbook(self._playbook.docker)
+        return self._run_playbook(self._playbook.docker, name="docker")
 
     def gof3r(self):
         """Install gof3r."""
-        return self._run_playbook(self._playbook.gof3r)
+        return self._run_playbook(self._playbook.gof3r, name="gof3r")
 
     def nfs(self):
         """Mount encrypted NFS volume on master node and expose
@@ -127,15 +302,115 @@ class Bootstrap(object):
                     ["nodes", "frontend", "encrypted_volume_device"],
                     cluster_config, "/dev/xvdf")}
 
-        return self._run_playbook(self._playbook.nfs, _extra_vars)
+        return self._run_playbook(self._playbook.nfs, _extra_vars,
+                                  name="nfs")
+
+    @staticmethod
+    def _portable_error(exc):
+        """Return the received exception if it can be sent to another
+        process or its description otherwise.
+        """
+        try:
+            pickle.loads(pickle.dumps(exc))
+        except Exception:   # pylint: disable=broad-except
+            return "".join(
+                traceback.format_exception_only(type(exc), exc)).strip()
+        return exc
+
+    def _run_step(self, playbook_name, results):
+        """Run the received playbook and put its response in the
+        results queue.
+
+        Note: This method is executed in a worker process.
+        """
+        try:
+            response = getattr(self, playbook_name)()
+        except Exception as exc:    # pylint: disable=broad-except
+            LOG.exception("The %(playbook)r playbook failed.",
+                          {"playbook": playbook_name})
+            results.put((playbook_name, None, self._portable_error(exc)))
+        else:
+            results.put((playbook_name, response, None))
+
+    def _wait(self, results, workers):
+        """Return the first result sent by the workers.
+
+        The workers which exited without sending their result are
+        reported as failed.
+        """
+        while True:
+            try:
+                return results.get(timeout=self._POLL_INTERVAL)
+            except queue.Empty:
+                pass
+
+            for playbook_name, worker in workers.items():
+                if worker.is_alive():
+                    continue
+                try:
+                    # The result could be sent right before the exit.
+                    return results.get(block=False)
+                except queue.Empty:
+                    return (playbook_name, None, exception.BCBioException(
+                        "The process running the %(playbook)r playbook "
+                        "exited with code %(code)s.",
+                        playbook=playbook_name, code=worker.exitcode))
 
     def run(self):
         """Install or update the bcbio-nextgen code and the tools
-        with the latest version available."""
+        with the latest version available.
+
+        The playbooks are executed as soon as all their dependencies
+        finished successfully. The playbooks which depend on a failed
+        playbook are not executed.
+        """
         result = {}
-        for playbook_name in self.PLAYBOOK_ORDER:
-            playbook = getattr(self, playbook_name)
-            result[playbook_name] = playbook()
-            if not result[playbook_name].status:
+        failed = set()
+        error = None
+        results = multiprocessing.Queue()
+        pending = collections.OrderedDict(
+            (playbook_name, set(self.PLAYBOOK_DEPENDENCIES.get(
+                playbook_name, ())))
+            for playbook_name in self.PLAYBOOK_ORDER)
+        workers = {}
+
+        while pending or workers:
+            for playbook_name, dependencies in list(pending.items()):
+                if dependencies & failed:
+                    LOG.warning("Skipping the %(playbook)r playbook, one of "
+                                "its dependencies failed.",
+                                {"playbook": playbook_name})
+                    failed.add(playbook_name)
+                    del pending[playbook_name]
+
+                elif dependencies <= set(result) and error is None:
+                    LOG.debug("Starting the %(playbook)r playbook.",
+                              {"playbook": playbook_name})
+                    worker = multiprocessing.Process(
+                        target=self._run_step, args=(playbook_name, results))
+                    worker.daemon = True
+                    worker.start()
+                    workers[playbook_name] = worker
+                    del pending[playbook_name]
+
+            if not workers:
                 break
+
+            playbook_name, response, playbook_error = self._wait(results,
+                                                                 workers)
+            workers.pop(playbook_name).join()
+            if playbook_error is not None:
+                failed.add(playbook_name)
+                if not isinstance(playbook_error, Exception):
+                    playbook_error = exception.BCBioException(
+                        "The %(playbook)r playbook failed: %(error)s",
+                        playbook=playbook_name, error=playbook_error)
+                error = error or playbook_error
+            else:
+                result[playbook_name] = response
+                if not response.status:
+                    failed.add(playbook_name)
+
+        if error:
+            raise error
         return result
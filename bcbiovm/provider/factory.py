@@ -1,39 +1,44 @@
-"""Cloud provider factory."""
+"""Cloud provider factory.
+
+The classes are referenced using their import path and they are loaded
+only when they are required, so using the factory does not import all
+the providers and their dependencies.
+"""
 import collections
 
 from bcbiovm import config as bcbio_config
 from bcbiovm.common import constant
 from bcbiovm.common import exception
-from bcbiovm.provider import ship as shared_ship
-from bcbiovm.provider.aws import aws_provider
-from bcbiovm.provider.aws import ship as aws_ship
-from bcbiovm.provider.aws import storage as aws_storage
-from bcbiovm.provider.azure import azure_provider
-from bcbiovm.provider.azure import ship as azure_ship
-from bcbiovm.provider.azure import storage as azure_storage
+from bcbiovm.common import importutils
 
 _Ship = collections.namedtuple("Ship", ["pack", "reconstitute"])
 
 CLOUD_PROVIDER = {
-    constant.PROVIDER.AWS: aws_provider.AWSProvider,
-    constant.PROVIDER.AZURE: azure_provider.AzureProvider,
+    constant.PROVIDER.AWS: "bcbiovm.provider.aws.aws_provider.AWSProvider",
+    constant.PROVIDER.AZURE: ("bcbiovm.provider.azure.azure_provider."
+                              "AzureProvider"),
 }
 
 SHIP = {
-    "blob": (azure_ship.BlobPack, azure_ship.ReconstituteBlob),
-    "shared": (None, shared_ship.ReconstituteShared),
-    "S3": (aws_ship.S3Pack, aws_ship.ReconstituteS3),
+    "blob": ("bcbiovm.provider.azure.ship.BlobPack",
+             "bcbiovm.provider.azure.ship.ReconstituteBlob"),
+    "shared": (None, "bcbiovm.provider.ship.ReconstituteShared"),
+    "S3": ("bcbiovm.provider.aws.ship.S3Pack",
+           "bcbiovm.provider.aws.ship.ReconstituteS3"),
 }
 
 SHIP_CONFIG = {
-    "blob": (azure_ship.shipping_config, azure_ship.get_shipping_config),
-    "shared": (shared_ship.shipping_config, shared_ship.get_shipping_config),
-    "S3": (aws_ship.shipping_config, aws_ship.get_shipping_config)
+    "blob": ("bcbiovm.provider.azure.ship.shipping_config",
+             "bcbiovm.provider.azure.ship.get_shipping_config"),
+    "shared": ("bcbiovm.provider.ship.shipping_config",
+               "bcbiovm.provider.ship.get_shipping_config"),
+    "S3": ("bcbiovm.provider.aws.ship.shipping_config",
+           "bcbiovm.provider.aws.ship.get_shipping_config"),
 }
 
 STORAGE = {
-    constant.PROVIDER.AWS: aws_storage.AmazonS3,
-    constant.PROVIDER.AZURE: azure_storage.AzureBlob,
+    constant.PROVIDER.AWS: "bcbiovm.provider.aws.storage.AmazonS3",
+    constant.PROVIDER.AZURE: "bcbiovm.provider.azure.storage.AzureBlob",
 }
 
 
@@ -44,7 +49,7 @@ def get(cloud_provider=None):
     if not provider:
         raise exception.NotFound(object=provider,
                                  container=CLOUD_PROVIDER.keys())
-    return provider
+    return importutils.resolve(provider)
 
 
 def get_ship(provider):
@@ -54,8 +59,10 @@ def get_ship(provider):
         raise exception.NotFound(object=provider,
                                  container=SHIP.keys())
 
-    return _Ship(pack=ship[0]() if ship[0] else None,
-                 reconstitute=ship[1]() if ship[1] else None)
+    pack, reconstitute = [importutils.resolve(item) if item else None
+                          for item in ship]
+    return _Ship(pack=pack() if pack else None,
+                 reconstitute=reconstitute() if reconstitute else None)
 
 
 def get_ship_config(provider, raw=True):
@@ -64,7 +71,7 @@ def get_ship_config(provider, raw=True):
     if not ship_config:
         raise exception.NotFound(object=provider,
                                  container=SHIP_CONFIG.keys())
-    return ship_config[raw]
+    return importutils.resolve(ship_config[raw])
 
 
 def get_storage(cloud_provider):
@@ -73,4 +80,4 @@ def get_storage(cloud_provider):
     if not storage_manager:
         raise exception.NotFound(object=storage_manager,
                                  container=STORAGE.keys())
-    return storage_manager
+    return importutils.resolve(storage_manager)
@@ -7,9 +7,10 @@ and shared types that support that contract.
 import abc
 import os
 
-import yaml
 import six
 
+from bcbiovm.common import serialization
+
 
 @six.add_metaclass(abc.ABCMeta)
 class StorageManager(object):
@@ -64,9 +65,7 @@ class StorageManager(object):
                 "cur_dir": os.getcwd()})
 
         config.update(cls._jar_resources(list_function, sample_config))
-        with open(out_file, "w") as out_handle:
-            yaml.dump(config, out_handle, default_flow_style=False,
-                      allow_unicode=False)
+        serialization.write(config, out_file)
 
     @abc.abstractmethod
     def resource_exists(self, resource, context=None):
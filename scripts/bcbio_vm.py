@@ -13,9 +13,6 @@ import sys
 from bcbiovm import config
 from bcbiovm import log as logging
 from bcbiovm.client import base
-from bcbiovm.client import commands as client_commands
-from bcbiovm.client import groups
-from bcbiovm.client.commands import container
 
 LOG = logging.get_logger(__name__)
 
@@ -24,18 +21,25 @@ class BCBioClient(base.Client):
 
     """bcbio-nextgen-vm command line application."""
 
+    # Note: The commands are described by their import path in order to
+    # load only the modules required by the selected sub-command.
     commands = [
-        (container.docker.Run, "commands"),
-        (container.docker.Install, "commands"),
-        (container.docker.Upgrade, "commands"),
-        (container.docker.RunFunction, "commands"),
-        (container.docker.SaveConfig, "commands"),
-        (client_commands.common.Template, "commands"),
-        (client_commands.ipython.IPython, "commands"),
-        (client_commands.ipython.IPythonPrep, "commands"),
-        (groups.AWSProvider, "commands"),
-        (groups.AzureProvider, "commands"),
-        (groups.Tools, "commands"),
+        ("bcbiovm.client.commands.container.docker.Run", "commands", "run"),
+        ("bcbiovm.client.commands.container.docker.Install", "commands",
+         "install"),
+        ("bcbiovm.client.commands.container.docker.Upgrade", "commands",
+         "upgrade"),
+        ("bcbiovm.client.commands.container.docker.RunFunction", "commands",
+         "runfn"),
+        ("bcbiovm.client.commands.container.docker.SaveConfig", "commands",
+         "saveconfig"),
+        ("bcbiovm.client.commands.common.Template", "commands", "template"),
+        ("bcbiovm.client.commands.ipython.IPython", "commands", "ipython"),
+        ("bcbiovm.client.commands.ipython.IPythonPrep", "commands",
+         "ipythonprep"),
+        ("bcbiovm.client.groups.AWSProvider", "commands", "aws"),
+        ("bcbiovm.client.groups.AzureProvider", "commands", "azure"),
+        ("bcbiovm.client.groups.Tools", "commands", "tools"),
     ]
 
     def setup(self):
@@ -60,6 +64,18 @@ class BCBioClient(base.Client):
 
         self._register_parser("commands", commands)
 
+    def selected_command(self):
+        """The name of the sub-command selected by the command line.
+
+        The commands which are not exposed by the main parser belong
+        to the default cloud provider.
+        """
+        for argument in self.command_line:
+            if argument.startswith("-"):
+                continue
+            selected = super(BCBioClient, self).selected_command()
+            return selected or config["env.BCBIO_PROVIDER"]
+
     def _backward_compatibility(self):
         """Ensure backward compatibility."""
         index = 0
@@ -70,10 +86,8 @@ class BCBioClient(base.Client):
         else:
             return
 
-        if self.command_line[index] not in ("run", "install", "upgrade", "aws",
-                                            "runfn", "saveconfig", "template",
-                                            "ipython", "ipythonprep", "azure",
-                                            "tools"):
+        names = [item[2] for item in self.commands]
+        if self.command_line[index] not in names:
             self.command_line.insert(index, config["env.BCBIO_PROVIDER"])
 
     def prologue(self):
@@ -97,6 +111,7 @@ class BCBioClient(base.Client):
 def main():
     """Run the bcbio-nextgen-vm command line application."""
     if len(sys.argv) > 1 and sys.argv[1] == "elasticluster":
+        from bcbiovm.common import cluster
         sys.exit(cluster.ElastiCluster.execute(sys.argv[1:]))
 
     bcbio = BCBioClient(sys.argv[1:])
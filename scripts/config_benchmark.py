@@ -0,0 +1,44 @@
+#!/usr/bin/env python -E
+"""Measure the cost of reading values from the global config.
+
+The cached namespace views are compared with views built for every
+access (the behaviour before the namespaces were cached) and with the
+lookups by full key.
+"""
+from __future__ import print_function
+import argparse
+import timeit
+
+SETUP = "import bcbiovm; from bcbiovm import config"
+STATEMENTS = (
+    ("namespace (cached)", 'config.misc["attempts"]'),
+    ("namespace (rebuilt)",
+     'bcbiovm._NameSpace(config, "misc")["attempts"]'),
+    ("full key", 'config["misc.attempts"]'),
+    ("namespace get", 'config.misc.get("retry_interval")'),
+    ("env items", "config.env.items()"),
+    ("setitem + read",
+     'config["misc.attempts"] = 3; config.misc["attempts"]'),
+)
+
+
+def main():
+    """Run the benchmark and print the time for each statement."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "-n", "--number", type=int, default=100000,
+        help="Number of executions for each statement.")
+    parser.add_argument(
+        "-r", "--repeat", type=int, default=3,
+        help="Number of measurements for each statement.")
+    args = parser.parse_args()
+
+    print("%-22s %12s" % ("statement", "usec/loop"))
+    for name, statement in STATEMENTS:
+        best = min(timeit.repeat(statement, setup=SETUP,
+                                 number=args.number, repeat=args.repeat))
+        print("%-22s %12.3f" % (name, best / args.number * 1e6))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python -E
+"""Measure the time required for reading and writing large sample
+configurations.
+
+The pure Python YAML implementation is compared with the libyaml
+bindings used by `bcbiovm.common.serialization` and with JSON.
+"""
+from __future__ import print_function
+import argparse
+import json
+import timeit
+
+import yaml
+
+from bcbiovm.common import serialization
+
+
+def sample_config(samples):
+    """Return a sample configuration with the received number of
+    samples.
+    """
+    details = []
+    for index in range(samples):
+        details.append({
+            "analysis": "variant2",
+            "description": "sample-%d" % index,
+            "files": ["/data/sample-%d_1.fastq.gz" % index,
+                      "/data/sample-%d_2.fastq.gz" % index],
+            "genome_build": "GRCh37",
+            "metadata": {"batch": "batch-%d" % (index // 10),
+                         "phenotype": "tumor" if index % 2 else "normal"},
+            "algorithm": {"aligner": "bwa", "mark_duplicates": True,
+                          "recalibrate": False, "realign": False,
+                          "variantcaller": ["gatk-haplotype", "freebayes"],
+                          "variant_regions": "/data/regions.bed"},
+        })
+    return {"fc_name": "benchmark", "upload": {"dir": "../final"},
+            "details": details}
+
+
+def _python_load(content):
+    return yaml.load(content, Loader=yaml.SafeLoader)
+
+
+def _python_dump(data):
+    return yaml.dump(data, Dumper=yaml.SafeDumper, default_flow_style=False)
+
+
+def main():
+    """Run the benchmark and print the time for each implementation."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "-s", "--samples", type=int, default=5000,
+        help="Number of samples from the configuration.")
+    parser.add_argument(
+        "-r", "--repeat", type=int, default=3,
+        help="Number of measurements for each implementation.")
+    args = parser.parse_args()
+
+    data = sample_config(args.samples)
+    document = _python_dump(data)
+    json_document = json.dumps(data)
+    cases = (
+        ("yaml load (python)", lambda: _python_load(document)),
+        ("yaml load (module)", lambda: serialization.loads(document)),
+        ("json load (module)", lambda: serialization.loads(json_document)),
+        ("yaml dump (python)", lambda: _python_dump(data)),
+        ("yaml dump (module)", lambda: serialization.dump(data)),
+        ("json dump", lambda: json.dumps(data)),
+    )
+
+    print("samples: %d, libyaml: %s" % (args.samples, serialization.LIBYAML))
+    print("%-20s %10s" % ("case", "seconds"))
+    for name, function in cases:
+        best = min(timeit.repeat(function, number=1, repeat=args.repeat))
+        print("%-20s %10.3f" % (name, best))
+
+
+if __name__ == "__main__":
+    main()
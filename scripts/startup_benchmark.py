@@ -0,0 +1,220 @@
+#!/usr/bin/env python -E
+"""Measure the cold start time of the bcbio-nextgen-vm command line
+application for each of its sub-commands.
+
+Every measurement runs `bcbio_vm.py <sub-command> --help` in a fresh
+interpreter, in order to include the time spent importing the modules
+required by the sub-command. The results can be recorded as JSON and
+compared against a time budget, in which case the benchmark fails when
+the budget is exceeded. The benchmark also fails when a sub-command
+exits with an error, since its timing is not relevant.
+"""
+from __future__ import print_function
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import timeit
+
+SUBCOMMANDS = ("run", "install", "upgrade", "runfn", "saveconfig",
+               "template", "ipython", "ipythonprep", "aws", "azure",
+               "tools")
+BCBIO_VM = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        "bcbio_vm.py")
+# Note: Used for measuring the import time when the interpreter does
+# not support `-X importtime` (Python < 3.7).
+MODULES = ("bcbiovm.client.base", "bcbiovm.client.groups",
+           "bcbiovm.client.commands.common",
+           "bcbiovm.client.commands.container.docker",
+           "bcbiovm.client.commands.ipython",
+           "bcbiovm.provider.factory",
+           "bcbiovm.provider.aws.aws_provider",
+           "bcbiovm.provider.azure.azure_provider",
+           "bcbiovm.common.cluster",
+           "boto", "azure", "pandas", "ansible", "elasticluster",
+           "paramiko")
+IMPORT_TIME = ("import timeit; start = timeit.default_timer(); "
+               "import {module}; "
+               "print(timeit.default_timer() - start)")
+
+
+class BudgetExceeded(Exception):
+
+    """The cold start time exceeded the received budget or
+    a sub-command failed.
+    """
+
+
+def _run(command, repeat):
+    """Run the received command `repeat` times and return the
+    best wall time (in seconds), the exit code and the standard error
+    of the last run.
+    """
+    timings, process, stderr = [], None, None
+    for _ in range(repeat):
+        start = timeit.default_timer()
+        process = subprocess.Popen(command, stdout=subprocess.PIPE,
+                                   stderr=subprocess.PIPE,
+                                   universal_newlines=True)
+        _, stderr = process.communicate()
+        timings.append(timeit.default_timer() - start)
+    return min(timings), process.returncode, stderr
+
+
+def supports_importtime():
+    """Whether the current interpreter supports `-X importtime`."""
+    return sys.version_info >= (3, 7)
+
+
+def parse_importtime(output):
+    """Return the cumulative import time (in seconds) for each module
+    from the output of `python -X importtime`.
+    """
+    modules = {}
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line.split(":", 1)[1].split("|")
+        if len(fields) != 3 or not fields[1].strip().isdigit():
+            # The header of the report
+            continue
+        modules[fields[2].strip()] = int(fields[1]) / 1e6
+    return modules
+
+
+def module_times(modules):
+    """Return the import time (in seconds) for each of the received
+    modules, each one imported in a fresh interpreter.
+    """
+    timings = {}
+    for module in modules:
+        process = subprocess.Popen(
+            [sys.executable, "-c", IMPORT_TIME.format(module=module)],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            universal_newlines=True)
+        stdout, _ = process.communicate()
+        if process.returncode == 0:
+            timings[module] = float(stdout.strip())
+    return timings
+
+
+def cold_start(subcommand, repeat):
+    """Return the best wall time (in seconds) of the received
+    sub-command from `repeat` runs, its exit code and the import time
+    of the modules loaded by it.
+    """
+    command = [sys.executable, BCBIO_VM, subcommand, "--help"]
+    seconds, returncode, _ = _run(command, repeat)
+    if not supports_importtime():
+        return seconds, returncode, None
+
+    _, _, stderr = _run([sys.executable, "-X", "importtime"] + command[1:],
+                        1)
+    return seconds, returncode, parse_importtime(stderr)
+
+
+def load_budget(path):
+    """Load the budget from the received JSON file.
+
+    The file contains the maximum cold start time (in seconds) for
+    each sub-command. The `default` key is used for the sub-commands
+    without an explicit budget.
+    """
+    with open(path, "r") as file_handle:
+        return json.load(file_handle)
+
+
+def check_budget(results, budget):
+    """Check the measured cold start time against the received budget.
+
+    The sub-commands which exited with an error are reported as
+    failures regardless of the budget.
+
+    :raises: BudgetExceeded
+    """
+    exceeded = []
+    for subcommand, result in sorted(results.items()):
+        if result["returncode"] != 0:
+            exceeded.append("%s: exit code %d" %
+                            (subcommand, result["returncode"]))
+            continue
+        limit = budget.get(subcommand, budget.get("default"))
+        if limit is not None and result["seconds"] > limit:
+            exceeded.append("%s: %.3fs > %.3fs" %
+                            (subcommand, result["seconds"], limit))
+    if exceeded:
+        raise BudgetExceeded("; ".join(exceeded))
+
+
+def _top(modules, count):
+    """Return the slowest `count` modules."""
+    ranking = sorted(modules.items(), key=lambda item: item[1],
+                     reverse=True)
+    return [{"module": module, "seconds": seconds}
+            for module, seconds in ranking[:count]]
+
+
+def main():
+    """Run the benchmark for the received sub-commands."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "subcommands", nargs="*", default=SUBCOMMANDS,
+        help="The sub-commands which should be measured.")
+    parser.add_argument(
+        "-n", "--repeat", type=int, default=3,
+        help="Number of runs for each sub-command.")
+    parser.add_argument(
+        "--top", type=int, default=10,
+        help="Number of the slowest modules reported for each "
+             "sub-command.")
+    parser.add_argument(
+        "-o", "--output", default=None,
+        help="Record the results as JSON in the received file.")
+    parser.add_argument(
+        "--budget", type=float, default=None,
+        help="The maximum cold start time (in seconds) accepted for "
+             "each sub-command. It overrides the `default` key from "
+             "the budget file.")
+    parser.add_argument(
+        "--budget-file", dest="budget_file", default=None,
+        help="JSON file with the maximum cold start time (in seconds) "
+             "for each sub-command.")
+    args = parser.parse_args()
+
+    budget = load_budget(args.budget_file) if args.budget_file else {}
+    if args.budget is not None:
+        budget["default"] = args.budget
+
+    results = {}
+    print("%-15s %10s %10s" % ("sub-command", "seconds", "exit code"))
+    for subcommand in args.subcommands:
+        seconds, returncode, modules = cold_start(subcommand, args.repeat)
+        results[subcommand] = {"seconds": seconds, "returncode": returncode}
+        if modules is not None:
+            results[subcommand]["imports"] = _top(modules, args.top)
+        print("%-15s %10.3f %10d" % (subcommand, seconds, returncode))
+
+    report = {
+        "python": platform.python_version(),
+        "repeat": args.repeat,
+        "budget": budget,
+        "subcommands": results,
+    }
+    if not supports_importtime():
+        report["modules"] = module_times(MODULES)
+
+    if args.output:
+        with open(args.output, "w") as file_handle:
+            json.dump(report, file_handle, indent=2, sort_keys=True)
+
+    try:
+        check_budget(results, budget)
+    except BudgetExceeded as exc:
+        print("Benchmark failed: %s" % exc, file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()